@@ -1,10 +1,26 @@
 """
 DJI SDK Flight Commander
 Sends waypoints to DJI M350 RTK for autonomous navigation
+Waypoint timestamps are wall-clock; waypoint age uses time.monotonic()
 """
 
 import time
-from typing import Dict, Optional
+from typing import Dict, NamedTuple, Optional
+import sys
+import os
+
+# Add project root to path
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+from config import DEBUG_MODE
+
+class Waypoint(NamedTuple):
+    """Immutable waypoint record, so it can be shared without copying"""
+    lat: float
+    lon: float
+    alt: float
+    timestamp: float
 
 class FlightCommander:
     def __init__(self):
@@ -34,18 +50,14 @@ class FlightCommander:
                 return False
             
             # TODO: Replace with actual DJI SDK waypoint command
-            waypoint = {
-                'lat': lat,
-                'lon': lon,
-                'alt': alt,
-                'timestamp': time.time()
-            }
+            waypoint = Waypoint(lat, lon, alt, time.time())
             
-            print(f"Sending waypoint: {lat:.6f}, {lon:.6f}, {alt:.1f}m")
+            if DEBUG_MODE:
+                print(f"Sending waypoint: {lat:.6f}, {lon:.6f}, {alt:.1f}m")
             
             # Simulate waypoint transmission
             self.last_waypoint = waypoint
-            self.waypoint_sent_time = time.time()
+            self.waypoint_sent_time = time.monotonic()
             
             return True
             
@@ -55,30 +67,19 @@ class FlightCommander:
     
     def _validate_waypoint(self, lat: float, lon: float, alt: float) -> bool:
         """Validate waypoint coordinates"""
-        # Check latitude range
-        if not (-90 <= lat <= 90):
-            return False
-        
-        # Check longitude range  
-        if not (-180 <= lon <= 180):
-            return False
-        
-        # Check altitude range (reasonable for UAV operations)
-        if not (5 <= alt <= 200):  # 5m minimum, 200m maximum
-            return False
-        
-        return True
+        # Latitude, longitude, and altitude range (5m minimum, 200m maximum for UAV operations)
+        return (-90.0 <= lat <= 90.0) & (-180.0 <= lon <= 180.0) & (5.0 <= alt <= 200.0)
     
-    def get_last_waypoint(self) -> Optional[Dict]:
+    def get_last_waypoint(self) -> Optional[Waypoint]:
         """Get the last waypoint that was sent"""
-        return self.last_waypoint.copy() if self.last_waypoint else None
+        return self.last_waypoint
     
     def is_waypoint_recent(self, max_age_seconds=60.0) -> bool:
         """Check if a waypoint was sent recently"""
-        if not self.waypoint_sent_time:
+        if self.waypoint_sent_time is None:
             return False
         
-        return (time.time() - self.waypoint_sent_time) < max_age_seconds
+        return (time.monotonic() - self.waypoint_sent_time) < max_age_seconds
     
     def send_hover_command(self) -> bool:
         """Command drone to hover at current position"""
@@ -4,81 +4,83 @@ Interfaces with DJI M350 RTK to get GPS position
 """
 
 import time
-from typing import Dict, Optional
+from typing import NamedTuple, Optional
+
+class Position(NamedTuple):
+    """Immutable GPS fix, so it can be shared without copying"""
+    lat: float
+    lon: float
+    alt: float
+    timestamp: float
 
 class PositionReader:
     def __init__(self):
         """Initialize GPS position reader for DJI M350 RTK"""
-        self.last_position = {
-            'lat': -31.9502,  # Default Perth coordinates
-            'lon': 115.8563,
-            'alt': 50.0,
-            'timestamp': time.time()
-        }
+        self.last_position = Position(
+            lat=-31.9502,  # Default Perth coordinates
+            lon=115.8563,
+            alt=50.0,
+            timestamp=time.time()
+        )
         
         # TODO: Initialize actual DJI SDK connection
         print("DJI Position Reader initialized - ready for SDK integration")
     
-    def get_position(self) -> Dict[str, float]:
+    def get_position(self) -> Position:
         """
         Get current GPS position from DJI M350 RTK
         
         Returns:
-            Dictionary with lat, lon, alt, timestamp
+            Position with lat, lon, alt, timestamp
         """
         try:
             # TODO: Replace with actual DJI SDK call
             # For now, simulate slight movement for testing
+            # Sample the clock once and reuse it for drift and timestamp
             current_time = time.time()
             
             # Simulate small GPS drift for testing
             drift_lat = 0.0001 * (current_time % 10 - 5) / 5  # ±0.0001 degrees
             drift_lon = 0.0001 * ((current_time * 1.3) % 10 - 5) / 5
             
-            position = {
-                'lat': self.last_position['lat'] + drift_lat,
-                'lon': self.last_position['lon'] + drift_lon,
-                'alt': self.last_position['alt'] + 2.0 * (time.time() % 20 - 10) / 10,  # ±2m altitude variation
-                'timestamp': current_time
-            }
+            last = self.last_position
+            position = Position(
+                lat=last.lat + drift_lat,
+                lon=last.lon + drift_lon,
+                alt=last.alt + 2.0 * (current_time % 20 - 10) / 10,  # ±2m altitude variation
+                timestamp=current_time
+            )
             
-            self.last_position = position.copy()
+            self.last_position = position
             return position
             
         except Exception as e:
             print(f"Error reading GPS position: {e}")
             # Return last known position on error
-            return self.last_position.copy()
+            return self.last_position
     
     def get_altitude(self) -> float:
         """Get current altitude only"""
         position = self.get_position()
-        return position['alt']
+        return position.alt
     
     def get_coordinates(self) -> tuple:
         """Get current lat/lon as tuple"""
         position = self.get_position()
-        return (position['lat'], position['lon'])
+        return position.lat, position.lon
+    
+    @staticmethod
+    def _is_valid(position: Position) -> bool:
+        """Basic range checks on a position (altitude -100..1000 m is a reasonable range)"""
+        return ((-90.0 <= position.lat <= 90.0)
+                & (-180.0 <= position.lon <= 180.0)
+                & (-100.0 <= position.alt <= 1000.0))
     
     def is_position_valid(self) -> bool:
-        """Check if current position is valid"""
-        try:
-            position = self.get_position()
-            
-            # Basic validity checks
-            if not (-90 <= position['lat'] <= 90):
-                return False
-            if not (-180 <= position['lon'] <= 180):
-                return False
-            if position['alt'] < -100 or position['alt'] > 1000:  # Reasonable altitude range
-                return False
-            
-            return True
-            
-        except Exception:
-            return False
+        """Check if the most recent position is valid (does not poll a new fix)"""
+        return self._is_valid(self.last_position)
     
-    def wait_for_valid_position(self, timeout=30.0) -> Optional[Dict[str, float]]:
+    def wait_for_valid_position(self, timeout=30.0) -> Optional[Position]:
         """
         Wait for a valid GPS position
         
@@ -86,13 +88,14 @@ class PositionReader:
             timeout: Maximum time to wait in seconds
             
         Returns:
-            Valid position dict or None on timeout
+            Valid Position or None on timeout
         """
-        start_time = time.time()
+        start_time = time.monotonic()
         
-        while time.time() - start_time < timeout:
-            if self.is_position_valid():
-                return self.get_position()
+        while time.monotonic() - start_time < timeout:
+            position = self.get_position()
+            if self._is_valid(position):
+                return position
             
             time.sleep(0.5)
         
@@ -112,7 +115,7 @@ if __name__ == "__main__":
         print("Reading GPS position for 10 seconds...")
         for i in range(20):
             position = gps.get_position()
-            print(f"GPS: {position['lat']:.6f}, {position['lon']:.6f}, {position['alt']:.1f}m")
+            print(f"GPS: {position.lat:.6f}, {position.lon:.6f}, {position.alt:.1f}m")
             time.sleep(0.5)
         
     except KeyboardInterrupt:
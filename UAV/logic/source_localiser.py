@@ -4,14 +4,143 @@ Estimates gas source location using concentration, wind, and GPS data
 """
 
 import numpy as np
-import time
 import math
+import time
 from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+# Add project root to path
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+from shared import SimpleLogger as logger
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """Pure-Python fallback when numba is not installed"""
+        return lambda func: func
+
+# Earth radius in meters
+EARTH_RADIUS = 6371000.0
+_R_INV = 1.0 / EARTH_RADIUS
+_DEG = math.pi / 180.0
+
+# (sin, cos) of the eight 45° bearings used by the expanding spiral
+_SPIRAL_SC = [(math.sin(i * math.pi / 4), math.cos(i * math.pi / 4)) for i in range(8)]
+
+# Measurement columns, stored as parallel arrays (one row per sample)
+MEASUREMENT_FIELDS = ('timestamp', 'lat', 'lon', 'alt', 'co2_ppm', 'wind_dir', 'wind_speed')
+MAX_MEASUREMENTS = 2048  # Hard cap on top of the 10 minute window
+
+@njit(cache=True, fastmath=True)
+def _move_positions(lat, lon, bearing, distance):
+    """
+    Vectorised great-circle destination for NumPy arrays
+    
+    Args:
+        lat, lon: Starting positions in degrees
+        bearing: Directions in degrees (0=North)
+        distance: Distances in meters
+        
+    Returns:
+        New (lat, lon) positions in degrees
+    """
+    lat_rad = np.radians(lat)
+    bearing_rad = np.radians(bearing)
+    angular_dist = distance * _R_INV
+    
+    sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+    sin_dist, cos_dist = np.sin(angular_dist), np.cos(angular_dist)
+    
+    new_lat_rad = np.arcsin(sin_lat * cos_dist + cos_lat * sin_dist * np.cos(bearing_rad))
+    new_lon_rad = np.radians(lon) + np.arctan2(
+        np.sin(bearing_rad) * sin_dist * cos_lat,
+        cos_dist - sin_lat * np.sin(new_lat_rad)
+    )
+    
+    return np.degrees(new_lat_rad), np.degrees(new_lon_rad)
+
+@njit(cache=True, fastmath=True)
+def _backtrace_source(lats, lons, wind_dirs, co2):
+    """
+    Back-track measurements above background to a weighted source estimate
+    
+    Args:
+        lats, lons: Measurement positions in degrees
+        wind_dirs: Wind directions in degrees (0=North, 90=East)
+        co2: CO₂ concentrations in ppm
+        
+    Returns:
+        (source_lat, source_lon, confidence), or confidence 0.0 if no
+        measurement is above background (≈410ppm)
+    """
+    above = co2 > 410.0
+    if not above.any():
+        return 0.0, 0.0, 0.0
+    
+    # Estimate distance based on concentration and wind speed
+    # Higher concentration = closer to source
+    confidence = np.maximum(0.1, (co2[above] - 410.0) / 100.0)
+    estimated_distance = 50.0 / confidence  # Rough estimate
+    
+    # Candidate source positions lie upwind (opposite to wind)
+    upwind_dir = (wind_dirs[above] + 180.0) % 360.0
+    source_lats, source_lons = _move_positions(
+        lats[above], lons[above], upwind_dir, estimated_distance
+    )
+    
+    # Average the candidate positions weighted by confidence
+    total_weight = confidence.sum()
+    return ((source_lats * confidence).sum() / total_weight,
+            (source_lons * confidence).sum() / total_weight,
+            min(1.0, total_weight / confidence.size))
+
+def _move_position_sc(lat: float, lon: float, sin_b: float, cos_b: float,
+                      distance: float) -> Tuple[float, float]:
+    """Scalar great-circle destination for a bearing given as precomputed (sin, cos)"""
+    lat_rad = lat * _DEG
+    angular_dist = distance * _R_INV
+    
+    sin_lat, cos_lat = math.sin(lat_rad), math.cos(lat_rad)
+    sin_dist, cos_dist = math.sin(angular_dist), math.cos(angular_dist)
+    
+    new_lat_rad = math.asin(sin_lat * cos_dist + cos_lat * sin_dist * cos_b)
+    new_lon_rad = lon * _DEG + math.atan2(
+        sin_b * sin_dist * cos_lat,
+        cos_dist - sin_lat * math.sin(new_lat_rad)
+    )
+    
+    return new_lat_rad / _DEG, new_lon_rad / _DEG
+
+def _warm_up_jit():
+    """Compile (or load from cache) the JIT kernels, falling back to pure Python"""
+    global _move_positions, _backtrace_source
+    try:
+        dummy = np.zeros(1)
+        _backtrace_source(dummy, dummy, dummy, dummy)
+    except Exception as e:
+        # e.g. a cache entry written when this file was imported under another module name
+        print(f"Numba compilation failed, using pure-Python back-trace: {e}")
+        _move_positions = _move_positions.py_func
+        _backtrace_source = _backtrace_source.py_func
 
 class SourceLocaliser:
     def __init__(self):
         """Initialize source localisation algorithm"""
-        self.measurements = []
+        # Columnar measurement store; rows [_start, _n) are inside the window
+        self._cols = {field: np.empty(1024) for field in MEASUREMENT_FIELDS}
+        self._start = 0
+        self._n = 0
+        
+        if NUMBA_AVAILABLE:
+            # Compile now so the first sample doesn't pay for it
+            _warm_up_jit()
         self.ground_station_pos = None
         self.estimated_source = None
         self.search_pattern = "expanding_spiral"
@@ -36,78 +165,122 @@ class SourceLocaliser:
             wind_dir: Wind direction in degrees (0=North, 90=East)
             wind_speed: Wind speed in m/s
         """
-        measurement = {
-            'timestamp': time.time(),
-            'lat': lat,
-            'lon': lon,
-            'alt': alt,
-            'co2_ppm': co2_ppm,
-            'wind_dir': wind_dir,
-            'wind_speed': wind_speed
-        }
-        
-        self.measurements.append(measurement)
+        timestamp = time.time()
+        self._append_row((timestamp, lat, lon, alt, co2_ppm, wind_dir, wind_speed))
         
-        # Keep only recent measurements (last 10 minutes)
-        cutoff_time = time.time() - 600
-        self.measurements = [m for m in self.measurements if m['timestamp'] > cutoff_time]
+        # Keep only recent measurements (last 10 minutes); timestamps are sorted
+        cutoff_time = timestamp - 600
+        self._start += int(np.searchsorted(self._column('timestamp'), cutoff_time, side='right'))
         
         # Update source estimate
         self._update_source_estimate()
         
-        print(f"Measurement added: CO₂={co2_ppm:.1f}ppm, Wind={wind_dir:.1f}°@{wind_speed:.1f}m/s")
+        logger.debug("Measurement added: CO₂=%.1fppm, Wind=%.1f°@%.1fm/s", co2_ppm, wind_dir, wind_speed)
+    
+    def update_batch(self, measurements):
+        """
+        Add several measurements at once and update the source estimate once
+        
+        Args:
+            measurements: Sequence or (N, 6) array of rows
+                (lat, lon, alt, co2_ppm, wind_dir, wind_speed), all stamped now
+        """
+        measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, len(MEASUREMENT_FIELDS) - 1)
+        if len(measurements) == 0:
+            return
+        
+        timestamp = time.time()
+        rows = np.empty((len(measurements), len(MEASUREMENT_FIELDS)))
+        rows[:, 0] = timestamp
+        rows[:, 1:] = measurements
+        self._append_rows(rows)
+        
+        # Keep only recent measurements (last 10 minutes); timestamps are sorted
+        cutoff_time = timestamp - 600
+        self._start += int(np.searchsorted(self._column('timestamp'), cutoff_time, side='right'))
+        
+        self._update_source_estimate()
+        
+        logger.debug("Added %d measurements, max CO₂=%.1fppm", len(measurements), measurements[:, 3].max())
+    
+    def _append_rows(self, rows: np.ndarray):
+        """Append a block of measurement rows, compacting or growing the columns as needed"""
+        rows = rows[-MAX_MEASUREMENTS:]
+        count_new = len(rows)
+        capacity = len(self._cols['timestamp'])
+        
+        if self._n + count_new > capacity:
+            # Drop expired rows first; grow until the block leaves half the space free
+            count = self._n - self._start
+            while (count + count_new) * 2 > capacity:
+                capacity *= 2
+            
+            for field, col in self._cols.items():
+                grown = np.empty(capacity)
+                grown[:count] = col[self._start:self._n]
+                self._cols[field] = grown
+            
+            self._start, self._n = 0, count
+        
+        for i, col in enumerate(self._cols.values()):
+            col[self._n:self._n + count_new] = rows[:, i]
+        self._n += count_new
+        self._start = max(self._start, self._n - MAX_MEASUREMENTS)
+    
+    def _append_row(self, row: Tuple[float, ...]):
+        """Append one measurement row, compacting or growing the columns as needed"""
+        capacity = len(self._cols['timestamp'])
+        
+        if self._n - self._start >= MAX_MEASUREMENTS:
+            self._start += 1
+        
+        if self._n == capacity:
+            # Drop expired rows first; only double when still over half full
+            count = self._n - self._start
+            if count * 2 > capacity:
+                capacity *= 2
+            
+            for field, col in self._cols.items():
+                grown = np.empty(capacity)
+                grown[:count] = col[self._start:self._n]
+                self._cols[field] = grown
+            
+            self._start, self._n = 0, count
+        
+        for col, value in zip(self._cols.values(), row):
+            col[self._n] = value
+        self._n += 1
+    
+    def _column(self, field: str, last: Optional[int] = None) -> np.ndarray:
+        """View of one measurement column, optionally only the last N rows"""
+        start = self._start if last is None else max(self._start, self._n - last)
+        return self._cols[field][start:self._n]
     
     def _update_source_estimate(self):
         """Update estimated source location based on all measurements"""
-        if len(self.measurements) < 3:
+        if self._n - self._start < 3:
             return  # Need minimum measurements
         
         try:
             # Simple back-tracking algorithm
             # Assume gas travels downwind from source
             
-            candidate_sources = []
-            
-            for measurement in self.measurements[-10:]:  # Use last 10 measurements
-                if measurement['co2_ppm'] > 410:  # Above background (≈410ppm)
-                    
-                    # Calculate upwind direction (opposite to wind)
-                    upwind_dir = (measurement['wind_dir'] + 180) % 360
-                    
-                    # Estimate distance based on concentration and wind speed
-                    # Higher concentration = closer to source
-                    concentration_factor = max(0.1, (measurement['co2_ppm'] - 410) / 100)
-                    estimated_distance = 50.0 / concentration_factor  # Rough estimate
-                    
-                    # Calculate candidate source position
-                    source_lat, source_lon = self._move_position(
-                        measurement['lat'], measurement['lon'],
-                        upwind_dir, estimated_distance
-                    )
-                    
-                    candidate_sources.append({
-                        'lat': source_lat,
-                        'lon': source_lon,
-                        'confidence': concentration_factor,
-                        'distance': estimated_distance
-                    })
+            # Use last 10 measurements
+            avg_lat, avg_lon, confidence = _backtrace_source(
+                self._column('lat', last=10), self._column('lon', last=10),
+                self._column('wind_dir', last=10), self._column('co2_ppm', last=10)
+            )
             
-            if candidate_sources:
-                # Average the candidate positions weighted by confidence
-                total_weight = sum(c['confidence'] for c in candidate_sources)
+            if confidence > 0:
+                avg_lat, avg_lon = float(avg_lat), float(avg_lon)
+                self.estimated_source = {
+                    'lat': avg_lat,
+                    'lon': avg_lon,
+                    'confidence': float(confidence),
+                    'timestamp': time.time()
+                }
                 
-                if total_weight > 0:
-                    avg_lat = sum(c['lat'] * c['confidence'] for c in candidate_sources) / total_weight
-                    avg_lon = sum(c['lon'] * c['confidence'] for c in candidate_sources) / total_weight
-                    
-                    self.estimated_source = {
-                        'lat': avg_lat,
-                        'lon': avg_lon,
-                        'confidence': min(1.0, total_weight / len(candidate_sources)),
-                        'timestamp': time.time()
-                    }
-                    
-                    print(f"Source estimate updated: {avg_lat:.6f}, {avg_lon:.6f} (confidence: {self.estimated_source['confidence']:.2f})")
+                logger.debug("Source estimate updated: %.6f, %.6f (confidence: %.2f)", avg_lat, avg_lon, confidence)
         
         except Exception as e:
             print(f"Error updating source estimate: {e}")
@@ -119,13 +292,13 @@ class SourceLocaliser:
         Returns:
             Dictionary with lat, lon, alt for next waypoint
         """
-        if not self.measurements:
+        if self._n == self._start:
             return None
         
-        current_measurement = self.measurements[-1]
-        current_lat = current_measurement['lat']
-        current_lon = current_measurement['lon']
-        current_alt = current_measurement['alt']
+        last = self._n - 1
+        current_lat = float(self._cols['lat'][last])
+        current_lon = float(self._cols['lon'][last])
+        current_alt = float(self._cols['alt'][last])
         
         # If we have a high-confidence source estimate, navigate towards it
         if (self.estimated_source and 
@@ -150,18 +323,18 @@ class SourceLocaliser:
         
         if self.search_pattern == "expanding_spiral":
             # Simple expanding spiral search
-            measurement_count = len(self.measurements)
-            angle = (measurement_count * 45) % 360  # 45° increments
+            measurement_count = self._n - self._start
+            sin_b, cos_b = _SPIRAL_SC[measurement_count % 8]  # 45° increments
             radius = min(self.search_radius, 10 + measurement_count * 2)  # Expanding radius
             
-            target_lat, target_lon = self._move_position(
-                current_lat, current_lon, angle, radius
+            target_lat, target_lon = _move_position_sc(
+                current_lat, current_lon, sin_b, cos_b, radius
             )
             
         elif self.search_pattern == "crosswind":
             # Search perpendicular to wind direction
-            if self.measurements:
-                wind_dir = self.measurements[-1]['wind_dir']
+            if self._n > self._start:
+                wind_dir = float(self._cols['wind_dir'][self._n - 1])
                 crosswind_dir = (wind_dir + 90) % 360  # Perpendicular to wind
                 
                 target_lat, target_lon = self._move_position(
@@ -193,26 +366,8 @@ class SourceLocaliser:
         Returns:
             New (lat, lon) position
         """
-        # Convert to radians
-        lat_rad = math.radians(lat)
-        lon_rad = math.radians(lon)
-        bearing_rad = math.radians(bearing)
-        
-        # Earth radius in meters
-        R = 6371000
-        
-        # Calculate new position
-        new_lat_rad = math.asin(
-            math.sin(lat_rad) * math.cos(distance / R) +
-            math.cos(lat_rad) * math.sin(distance / R) * math.cos(bearing_rad)
-        )
-        
-        new_lon_rad = lon_rad + math.atan2(
-            math.sin(bearing_rad) * math.sin(distance / R) * math.cos(lat_rad),
-            math.cos(distance / R) - math.sin(lat_rad) * math.sin(new_lat_rad)
-        )
-        
-        return math.degrees(new_lat_rad), math.degrees(new_lon_rad)
+        bearing_rad = bearing * _DEG
+        return _move_position_sc(lat, lon, math.sin(bearing_rad), math.cos(bearing_rad), distance)
     
     def get_source_estimate(self) -> Optional[Dict]:
         """Get current source location estimate"""
@@ -220,17 +375,16 @@ class SourceLocaliser:
     
     def get_search_statistics(self) -> Dict:
         """Get statistics about the search"""
-        if not self.measurements:
+        co2_values = self._column('co2_ppm')
+        if not co2_values.size:
             return {}
         
-        co2_values = [m['co2_ppm'] for m in self.measurements]
-        
         return {
-            'total_measurements': len(self.measurements),
-            'max_co2': max(co2_values),
-            'min_co2': min(co2_values),
-            'avg_co2': sum(co2_values) / len(co2_values),
-            'search_time_minutes': (time.time() - self.measurements[0]['timestamp']) / 60,
+            'total_measurements': int(co2_values.size),
+            'max_co2': float(co2_values.max()),
+            'min_co2': float(co2_values.min()),
+            'avg_co2': float(co2_values.mean()),
+            'search_time_minutes': (time.time() - float(self._cols['timestamp'][self._start])) / 60,
             'source_confidence': self.estimated_source['confidence'] if self.estimated_source else 0.0
         }
 
@@ -5,74 +5,94 @@ Handles LoRa communication, sensor reading, GPS, and flight control
 """
 
 import time
-import json
-import sys
-import threading
-from datetime import datetime
+import selectors
 
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
-from sensors.sprintir_reader import SprintIRReader
-from comms.lora_responder import LoRaResponder
+from sensors.sprintir_reader import CO2Reader
+from shared.lora_communication import LoRaCommunication
 from dji_sdk.position_reader import PositionReader
 from dji_sdk.flight_commander import FlightCommander
 from logic.source_localiser import SourceLocaliser
 from shared import SimpleLogger as logger
+from shared import utc_timestamp
+
+# UAV,timestamp,lat,lon,alt_m,co2_ppm
+UAV_RESPONSE_FORMAT = "UAV,%.2f,%.6f,%.6f,%.1f,%.1f"
+
+# Reuse a position fix for this long; the GPS only updates at 1-10 Hz anyway
+GPS_CACHE_TTL = 0.1
+
+# Reconnect backoff after a UART drops out (seconds, doubled per failure)
+RECONNECT_BASE = 1.0
+RECONNECT_CAP = 30.0
 
 class UAVController:
     def __init__(self):
         """Initialize UAV controller with all subsystems"""
-        self.co2_sensor = SprintIRReader(port='/dev/ttyAMA1')  # UART5 (GPIO12/13)
-        self.lora = LoRaResponder(port='/dev/ttyAMA2')         # UART3 (GPIO4/5)
+        self.co2_sensor = CO2Reader(port='/dev/ttyAMA1', background=False)  # UART5 (GPIO12/13)
+        self.lora = LoRaCommunication(port='/dev/ttyAMA2')     # UART3 (GPIO4/5)
         self.gps = PositionReader()
         self.flight_controller = FlightCommander()
         self.localiser = SourceLocaliser()
         self.running = False
+        self._selector = None
+        
+        # UARTs that dropped out and wait to be reopened: device -> [handler, retry_at, backoff]
+        self._reconnects = {}
+        
+        self._gps_cache = None
+        self._gps_cache_time = 0.0
+        
+        # Measurements from one burst of wind packets, fed to the localiser together
+        self._pending_measurements = []
         
         logger.info("UAV Controller initialized")
     
+    def _cached_position(self):
+        """Current position, re-read from the GPS at most once per GPS_CACHE_TTL"""
+        now = time.monotonic()
+        if self._gps_cache is None or now - self._gps_cache_time > GPS_CACHE_TTL:
+            self._gps_cache = self.gps.get_position()
+            self._gps_cache_time = now
+        return self._gps_cache
+    
     def handle_wind_packet(self, packet_data):
         """Process incoming wind data and respond with UAV telemetry"""
         try:
             # Parse wind packet: WIND,timestamp,wind_direction_deg,wind_speed_mps
-            parts = packet_data.strip().split(',')
-            if len(parts) != 4 or parts[0] != 'WIND':
+            parsed = self.lora.parse_wind(packet_data.strip())
+            if parsed is None:
                 raise ValueError(f"Invalid wind packet format: {packet_data}")
             
-            timestamp = float(parts[1])
-            wind_direction = float(parts[2])
-            wind_speed = float(parts[3])
+            timestamp, wind_direction, wind_speed = parsed
             
             # Read current sensor data
             co2_ppm = self.co2_sensor.read_co2()
-            gps_data = self.gps.get_position()
+            gps_data = self._cached_position()
             
-            # Update source estimation
-            self.localiser.update_measurement(
-                gps_data['lat'], gps_data['lon'], gps_data['alt'],
-                co2_ppm, wind_direction, wind_speed
+            # Queue for source estimation; the localiser runs once per packet burst
+            self._pending_measurements.append(
+                (gps_data.lat, gps_data.lon, gps_data.alt, co2_ppm, wind_direction, wind_speed)
             )
             
-            # Get new target waypoint
-            target = self.localiser.get_next_waypoint()
-            if target:
-                self.flight_controller.send_waypoint(target['lat'], target['lon'], target['alt'])
-            
             # Create response packet: UAV,timestamp,lat,lon,alt_m,co2_ppm
             response_timestamp = time.time()
-            response = f"UAV,{response_timestamp:.2f},{gps_data['lat']:.6f},{gps_data['lon']:.6f},{gps_data['alt']:.1f},{co2_ppm:.1f}"
+            response = UAV_RESPONSE_FORMAT % (response_timestamp, gps_data.lat, gps_data.lon, gps_data.alt, co2_ppm)
             
             # Log the interaction
             log_entry = {
-                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "timestamp": utc_timestamp(),
                 "event": "RECV_WIND",
                 "packet": packet_data.strip(),
                 "wind_direction_deg": wind_direction,
                 "wind_speed_mps": wind_speed,
                 "co2_ppm": co2_ppm,
-                "gps": gps_data,
+                "gps": gps_data._asdict(),
                 "response_packet": response,
                 "response_sent": True
             }
@@ -88,13 +108,11 @@ class UAVController:
         """Process initialization packet from ground station"""
         try:
             # Parse init packet: INIT,timestamp,ground_lat,ground_lon
-            parts = packet_data.strip().split(',')
-            if len(parts) != 4 or parts[0] != 'INIT':
+            parsed = self.lora.parse_init(packet_data.strip())
+            if parsed is None:
                 raise ValueError(f"Invalid init packet format: {packet_data}")
             
-            timestamp = float(parts[1])
-            ground_lat = float(parts[2])
-            ground_lon = float(parts[3])
+            timestamp, ground_lat, ground_lon = parsed
             
             # Store ground station location for source localisation
             self.localiser.set_ground_station_location(ground_lat, ground_lon)
@@ -103,8 +121,8 @@ class UAVController:
             
             # Send acknowledgment
             response_timestamp = time.time()
-            gps_data = self.gps.get_position()
-            response = f"UAV,{response_timestamp:.2f},{gps_data['lat']:.6f},{gps_data['lon']:.6f},{gps_data['alt']:.1f},0.0"
+            gps_data = self._cached_position()
+            response = UAV_RESPONSE_FORMAT % (response_timestamp, gps_data.lat, gps_data.lon, gps_data.alt, 0.0)
             
             return response
             
@@ -117,35 +135,112 @@ class UAVController:
         self.running = True
         logger.info("Starting UAV control loop")
         
+        # One thread waits on both UARTs and services whichever is readable,
+        # instead of a CO2 reader thread plus a blocking LoRa receive
+        self._selector = selector = selectors.DefaultSelector()
+        selector.register(self.co2_sensor.fileno(), selectors.EVENT_READ, self._on_co2_readable)
+        selector.register(self.lora.fileno(), selectors.EVENT_READ, self._on_lora_readable)
+        
         try:
             while self.running:
-                # Check for incoming LoRa packets
-                packet = self.lora.receive_packet(timeout=1.0)
-                
-                if packet:
-                    response = None
-                    
-                    if packet.startswith('WIND'):
-                        response = self.handle_wind_packet(packet)
-                    elif packet.startswith('INIT'):
-                        response = self.handle_init_packet(packet)
-                    else:
-                        logger.warning(f"Unknown packet type: {packet}")
-                    
-                    # Send response if generated
-                    if response:
-                        self.lora.send_response(response)
+                for key, _ in selector.select(timeout=1.0):
+                    key.data()
                 
-                # Small delay to prevent CPU overload
-                time.sleep(0.1)
+                if self._reconnects:
+                    self._retry_reconnects()
                 
         except KeyboardInterrupt:
             logger.info("UAV control loop stopped by user")
         except Exception as e:
             logger.error(f"UAV control loop error: {e}")
         finally:
+            selector.close()
             self.shutdown()
     
+    def _on_co2_readable(self):
+        """Consume streamed CO₂ frames"""
+        try:
+            self.co2_sensor.handle_readable()
+        except BlockingIOError:
+            pass  # spurious wakeup, nothing to read yet
+        except OSError as e:
+            # SerialException included: a dead UART stays readable, so stop
+            # watching it rather than spinning on it, and retry later
+            logger.error(f"CO2 sensor lost: {e}")
+            self._drop(self.co2_sensor, self._on_co2_readable)
+        except Exception as e:
+            logger.error(f"Error reading CO2 sensor: {e}")
+    
+    def _drop(self, device, handler):
+        """Unregister and close a failed UART and schedule its reconnect"""
+        self._selector.unregister(device.fileno())
+        device.close()
+        self._reconnects[device] = [handler, time.monotonic() + RECONNECT_BASE, RECONNECT_BASE]
+        logger.warning(f"Reconnecting to {device.port} in {RECONNECT_BASE:.0f}s")
+    
+    def _retry_reconnects(self):
+        """Try to reopen dropped UARTs whose backoff has expired, doubling it on failure"""
+        now = time.monotonic()
+        for device, entry in list(self._reconnects.items()):
+            handler, retry_at, backoff = entry
+            if now < retry_at:
+                continue
+            
+            try:
+                device.connect()
+            except Exception:
+                backoff = min(backoff * 2, RECONNECT_CAP)
+                entry[1:] = [time.monotonic() + backoff, backoff]
+                continue
+            
+            self._selector.register(device.fileno(), selectors.EVENT_READ, handler)
+            del self._reconnects[device]
+    
+    def _on_lora_readable(self):
+        """Handle every LoRa packet that has arrived without blocking"""
+        try:
+            packet = self.lora.receive_message(timeout=0)
+            while packet:
+                response = None
+                
+                if packet.startswith('WIND'):
+                    response = self.handle_wind_packet(packet)
+                elif packet.startswith('INIT'):
+                    response = self.handle_init_packet(packet)
+                else:
+                    logger.warning(f"Unknown packet type: {packet}")
+                
+                # Send response if generated
+                if response:
+                    self.lora.send_message(response)
+                
+                packet = self.lora.receive_message(timeout=0)
+            
+        except OSError as e:
+            # Same as the CO2 UART: stop watching a dead port and retry later
+            logger.error(f"LoRa module lost: {e}")
+            self._drop(self.lora, self._on_lora_readable)
+        
+        self._update_localiser()
+    
+    def _update_localiser(self):
+        """Feed queued measurements to the localiser in one batch and send the next waypoint"""
+        if not self._pending_measurements:
+            return
+        
+        try:
+            self.localiser.update_batch(self._pending_measurements)
+            
+            # Get new target waypoint
+            target = self.localiser.get_next_waypoint()
+            if target:
+                self.flight_controller.send_waypoint(target['lat'], target['lon'], target['alt'])
+            
+        except Exception as e:
+            logger.error(f"Error updating source estimate: {e}")
+        finally:
+            self._pending_measurements.clear()
+    
     def shutdown(self):
         """Clean shutdown of all subsystems"""
         self.running = False
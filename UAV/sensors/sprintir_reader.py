@@ -3,6 +3,8 @@ SprintIR-WF-20 CO₂ Sensor Reader
 UART interface to read filtered CO₂ concentrations in ppm
 """
 
+import array
+import select
 import serial
 import time
 import threading
@@ -11,25 +13,78 @@ import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 from config import CO2_PORT, CO2_BAUDRATE, SENSOR_READ_INTERVAL
 from shared import SimpleLogger as logger
 
+# Recent readings kept by the reading side (power of two for masking)
+CO2_HISTORY_SIZE = 64
+_CO2_HISTORY_MASK = CO2_HISTORY_SIZE - 1
+
+# Operating mode commands: streaming emits frames continuously at the
+# sensor's own rate, polling answers one frame per 'Z' request
+MODE_STREAMING = b'K 1\r\n'
+MODE_POLLING = b'K 2\r\n'
+
+# How long a command exchange waits for the sensor's reply
+CO2_COMMAND_TIMEOUT = 2.0
+
+# Reply to MODE_POLLING; streamed frames stop once it has been seen
+_POLLING_ACK = b'K 00002'
+
+# Frames are ~18 bytes; one read drains several, anything longer
+# without a newline is line noise
+CO2_READ_SIZE = 128
+
+def parse_filtered_co2(raw: bytes) -> Optional[float]:
+    """
+    Extract the filtered value from a SprintIR frame such as b"Z 00680 z 00659\r\n"
+    
+    Returns:
+        Filtered CO₂ reading or None for a malformed frame
+    """
+    # The filtered (z) value is always the last field of the frame
+    if b' z ' not in raw:
+        return None
+    try:
+        return float(raw.rstrip().rpartition(b' ')[2])
+    except ValueError:
+        return None
+
 class CO2Reader:
-    def __init__(self, port=CO2_PORT, baudrate=CO2_BAUDRATE):
+    def __init__(self, port=CO2_PORT, baudrate=CO2_BAUDRATE, background=True):
         """
         Initialize SprintIR CO₂ sensor
         
         Args:
             port: Serial port (UART5: GPIO12/13)
             baudrate: Communication speed
+            background: Read in a daemon thread; if False the owner must call
+                handle_readable() whenever fileno() is readable
         """
         self.port = port
         self.baudrate = baudrate
+        self.background = background
         self.serial_conn = None
-        self.latest_co2 = 0.0
         self.running = False
-        self.lock = threading.Lock()
+        self.read_thread = None
+        
+        # Single-producer/single-consumer ring of readings: only the reading
+        # side writes a slot and then bumps _co2_count, so readers need
+        # no lock (slot stores and int rebinds are atomic under the GIL)
+        self._co2_ring = array.array('d', [0.0] * CO2_HISTORY_SIZE)
+        self._co2_count = 0
+        
+        # Reused receive buffers for the reading side
+        self._fd = None
+        self._scratch = memoryview(bytearray(CO2_READ_SIZE))
+        self._rx_buf = bytearray()
+        
+        # Held by the background reader around each read and by command
+        # exchanges, so a command reply isn't consumed as a streamed frame
+        self._io_lock = threading.Lock()
         
         self.connect()
     
@@ -44,12 +99,18 @@ class CO2Reader:
                 bytesize=serial.EIGHTBITS,
                 timeout=1
             )
+            self._fd = self.serial_conn.fileno()
+            self._rx_buf.clear()  # drop any partial frame from a previous connection
+            
+            # Let the sensor push readings instead of polling it per sample
+            self.serial_conn.write(MODE_STREAMING)
             
-            # Start continuous reading thread
+            # Start continuous reading thread unless the owner multiplexes the fd itself
             self.running = True
-            self.read_thread = threading.Thread(target=self._continuous_read)
-            self.read_thread.daemon = True
-            self.read_thread.start()
+            if self.background:
+                self.read_thread = threading.Thread(target=self._continuous_read)
+                self.read_thread.daemon = True
+                self.read_thread.start()
             
             logger.info(f"CO2 sensor connected on {self.port}")
             
@@ -61,41 +122,62 @@ class CO2Reader:
         """Continuously read CO₂ values in background thread"""
         while self.running and self.serial_conn:
             try:
-                # Send command to request CO₂ reading
-                self.serial_conn.write(b'Z\r\n')
-                
-                # Read response
-                response = self.serial_conn.readline().decode().strip()
-                
-                # Parse response format: "Z 00680 z 00659"
-                # We want the filtered value (z), which is the second value
-                if 'z' in response:
-                    parts = response.split()
-                    for i, part in enumerate(parts):
-                        if part == 'z' and i + 1 < len(parts):
-                            try:
-                                co2_value = float(parts[i + 1])
-                                with self.lock:
-                                    self.latest_co2 = co2_value
-                                break
-                            except ValueError:
-                                continue
-                
-                time.sleep(0.05)  # 20 Hz maximum reading rate
+                # Block until streamed frames arrive, so no pacing sleep is needed
+                ready, _, _ = select.select([self._fd], [], [], 1.0)
+                if ready:
+                    with self._io_lock:
+                        self.handle_readable()
                 
+            except BlockingIOError:
+                continue  # a command exchange took the bytes first
             except Exception as e:
                 logger.error(f"Error reading from SprintIR sensor: {e}")
                 time.sleep(1)  # Wait before retrying
     
+    def fileno(self) -> int:
+        """File descriptor of the sensor UART, for select()/selectors"""
+        return self._fd
+    
+    def handle_readable(self):
+        """Read and parse whatever frames have arrived (call when fileno() is readable)"""
+        # Read everything available into the reused scratch buffer
+        n = os.readv(self._fd, [self._scratch])
+        if n == 0:
+            raise serial.SerialException("CO2 sensor disconnected (readable but no data)")
+        
+        buf = self._rx_buf
+        buf += self._scratch[:n]
+        
+        # Frame format "Z 00680 z 00659"; we want the filtered value (z)
+        while True:
+            idx = buf.find(b'\n')
+            if idx < 0:
+                break
+            co2_value = parse_filtered_co2(buf[:idx])
+            del buf[:idx + 1]
+            if co2_value is not None:
+                self._store_reading(co2_value)
+        
+        if len(buf) > CO2_READ_SIZE:
+            buf.clear()
+    
+    def _store_reading(self, co2_value: float):
+        """Append a reading to the ring (called from the reading side only)"""
+        count = self._co2_count
+        self._co2_ring[count & _CO2_HISTORY_MASK] = co2_value
+        self._co2_count = count + 1
+    
     def read_co2(self) -> float:
         """
         Get latest CO₂ reading
         
         Returns:
-            CO₂ concentration in ppm
+            CO₂ concentration in ppm (0.0 before the first reading)
         """
-        with self.lock:
-            return self.latest_co2
+        count = self._co2_count
+        if count == 0:
+            return 0.0
+        return self._co2_ring[(count - 1) & _CO2_HISTORY_MASK]
     
     def read_co2_sync(self) -> Optional[float]:
         """
@@ -108,26 +190,46 @@ class CO2Reader:
             return None
         
         try:
-            # Send command
-            self.serial_conn.write(b'Z\r\n')
-            
-            # Read response with timeout
-            response = self.serial_conn.readline().decode().strip()
-            
-            # Parse response format: "Z 00680 z 00659"
-            # Extract the filtered value (z)
-            if 'z' in response:
-                parts = response.split()
-                for i, part in enumerate(parts):
-                    if part == 'z' and i + 1 < len(parts):
-                        try:
-                            return float(parts[i + 1])
-                        except ValueError:
-                            continue
+            # Extract the filtered value (z) from the reply
+            reply = self._command(b'Z\r\n')
+            if reply is not None:
+                return parse_filtered_co2(reply)
             
         except Exception as e:
-            print(f"Error in synchronous CO₂ read: {e}")
+            logger.error(f"Error in synchronous CO₂ read: {e}")
+        
+        return None
+    
+    def _command(self, command: bytes) -> Optional[bytes]:
+        """
+        Send a command and return the sensor's reply line
+        
+        Streaming is paused (K 2) for the exchange and the command is only sent
+        once the sensor has acknowledged that, so streamed frames already in
+        flight aren't mistaken for the reply. Streaming is resumed afterwards.
+        With background=False, call this from the thread that services fileno().
         
+        Returns:
+            Reply line, or None if the sensor didn't answer in time
+        """
+        conn = self.serial_conn
+        with self._io_lock:
+            try:
+                if self._await_reply(MODE_POLLING, _POLLING_ACK) is None:
+                    return None
+                return self._await_reply(command, command[:1])
+            finally:
+                conn.write(MODE_STREAMING)
+                self._rx_buf.clear()
+    
+    def _await_reply(self, command: bytes, reply_prefix: bytes) -> Optional[bytes]:
+        """Write one command and skip lines until one starting with reply_prefix arrives"""
+        self.serial_conn.write(command)
+        deadline = time.monotonic() + CO2_COMMAND_TIMEOUT
+        while time.monotonic() < deadline:
+            line = self.serial_conn.readline()
+            if line.lstrip().startswith(reply_prefix):
+                return line
         return None
     
     def calibrate_zero(self):
@@ -136,22 +238,30 @@ class CO2Reader:
             return False
         
         try:
-            self.serial_conn.write(b'G\r\n')
-            response = self.serial_conn.readline().decode().strip()
-            print(f"Zero calibration response: {response}")
+            reply = self._command(b'G\r\n')
+            if reply is None:
+                logger.warning("No reply to zero calibration command")
+                return False
+            logger.info(f"Zero calibration response: {reply.decode().strip()}")
             return True
         except Exception as e:
-            print(f"Zero calibration failed: {e}")
+            logger.error(f"Zero calibration failed: {e}")
             return False
     
     def close(self):
         """Close serial connection"""
         self.running = False
         
-        if hasattr(self, 'read_thread'):
+        if self.read_thread is not None:
             self.read_thread.join(timeout=2)
+            self.read_thread = None
         
         if self.serial_conn:
+            try:
+                # Leave the sensor in polling mode for the next user
+                self.serial_conn.write(MODE_POLLING)
+            except Exception as e:
+                logger.warning(f"Could not restore CO2 sensor polling mode: {e}")
             self.serial_conn.close()
             self.serial_conn = None
         
@@ -8,13 +8,48 @@ import os
 import time
 
 # Add project root to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from shared.lora_communication import LoRaCommunication
 from config import TEST_PING_MSG, TEST_PONG_MSG
 from shared import SimpleLogger as logger
 
-def generate_test_response(message: str) -> str:
+def _test_ping_response(message: str, timestamp: int) -> str:
+    """Handle test ping messages: TEST_PING,74,1752578431"""
+    parts = message.split(',')
+    if len(parts) >= 3:
+        test_num = parts[1]
+        return f"{TEST_PONG_MSG},{test_num},{timestamp},UAV_OK"
+    return f"{TEST_PONG_MSG},{timestamp},UAV_OK"
+
+def _ping_response(message: str, timestamp: int) -> str:
+    """Respond to regular ping with pong"""
+    return f"PONG,{timestamp},UAV_ONLINE"
+
+def _status_response(message: str, timestamp: int) -> str:
+    """Respond with UAV status"""
+    return f"STATUS,{timestamp},FLYING,GPS_OK,CO2_OK"
+
+def _command_response(message: str, timestamp: int) -> str:
+    """Acknowledge command receipt"""
+    return f"CMD_ACK,{timestamp},RECEIVED"
+
+def _generic_response(message: str, timestamp: int) -> str:
+    """Generic acknowledgment"""
+    return f"ACK,{timestamp},RECEIVED"
+
+# Response handlers keyed on the message type (text before the first comma)
+_RESPONSE_HANDLERS = {
+    TEST_PING_MSG: _test_ping_response,
+    "PING": _ping_response,
+    "STATUS": _status_response,
+    "COMMAND": _command_response,
+}
+
+def generate_test_response(message: str, _handlers=_RESPONSE_HANDLERS,
+                           _default=_generic_response, _time=time.time) -> str:
     """
     Generate test-specific responses for LoRa communication
     
@@ -24,34 +59,12 @@ def generate_test_response(message: str) -> str:
     Returns:
         Response string
     """
-    timestamp = int(time.time())
+    # Underscore defaults bind the globals as locals (LOAD_FAST) at def time
+    timestamp = int(_time())
     
     # Parse message type
-    if message.startswith(TEST_PING_MSG):
-        # Handle test ping messages: TEST_PING,74,1752578431
-        parts = message.split(',')
-        if len(parts) >= 3:
-            test_num = parts[1]
-            orig_timestamp = parts[2]
-            return f"{TEST_PONG_MSG},{test_num},{timestamp},UAV_OK"
-        else:
-            return f"{TEST_PONG_MSG},{timestamp},UAV_OK"
-    
-    elif message.startswith("PING"):
-        # Respond to regular ping with pong
-        return f"PONG,{timestamp},UAV_ONLINE"
-    
-    elif message.startswith("STATUS"):
-        # Respond with UAV status
-        return f"STATUS,{timestamp},FLYING,GPS_OK,CO2_OK"
-    
-    elif message.startswith("COMMAND"):
-        # Acknowledge command receipt
-        return f"CMD_ACK,{timestamp},RECEIVED"
-    
-    else:
-        # Generic acknowledgment
-        return f"ACK,{timestamp},RECEIVED"
+    handler = _handlers.get(message.split(',', 1)[0], _default)
+    return handler(message, timestamp)
 
 def test_ping_pong_responder():
     """Test ping/pong response functionality"""
@@ -70,7 +83,7 @@ def test_ping_pong_responder():
         print("-" * 60)
         
         while True:
-            # Listen for incoming message
+            # Listen for incoming message (blocks in select until data arrives)
             message = lora.receive_message(timeout=1.0)
             
             if message:
@@ -91,9 +104,6 @@ def test_ping_pong_responder():
                 
                 print("-" * 60)
             
-            # Small delay to prevent CPU spinning
-            time.sleep(0.1)
-            
     except KeyboardInterrupt:
         print("\nTest stopped by user")
     except Exception as e:
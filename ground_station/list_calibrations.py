@@ -8,7 +8,9 @@ import sys
 import os
 
 # Add current directory to path
-sys.path.insert(0, os.path.dirname(__file__))
+_GROUND_STATION_DIR = os.path.abspath(os.path.dirname(__file__))
+if _GROUND_STATION_DIR not in sys.path:
+    sys.path.insert(0, _GROUND_STATION_DIR)
 
 from sensors.compass_calibration import CompassCalibrationManager
 
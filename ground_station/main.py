@@ -5,23 +5,32 @@ Sends wind data to UAV via LoRa and logs responses
 """
 
 import time
-import sys
-from datetime import datetime
+import random
+import signal
+import threading
 
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from ground_station.sensors.wind_vane_reader import WindVaneReader
 from sensors.gps_reader import GPSReader
-from comms.lora_transmitter import LoRaTransmitter
+from shared.lora_communication import LoRaCommunication
 from shared import SimpleLogger as logger
+from shared import utc_timestamp
+
+# WIND,timestamp,direction_deg,speed_mps
+WIND_PACKET_FORMAT = "WIND,%.2f,%.1f,%.1f"
+# INIT,timestamp,lat,lon
+INIT_PACKET_FORMAT = "INIT,%.2f,%.6f,%.6f"
 
 class GroundStationController:
     def __init__(self, use_gps=True):
         """Initialize ground station controller"""
         self.wind_sensor = WindVaneReader()
-        self.lora = LoRaTransmitter(port='/dev/ttyAMA2')  # UART3 (GPIO4/5)
+        self.lora = LoRaCommunication(port='/dev/ttyAMA2')  # UART3 (GPIO4/5)
         
         # GPS setup
         self.use_gps = use_gps
@@ -42,14 +51,23 @@ class GroundStationController:
         # Communication settings
         self.transmission_interval = 10.0  # seconds
         self.response_timeout = 10.0       # seconds
+        self.transaction_timeout = 30.0    # seconds, across all retries
         self.max_retries = 3
         
+        # Retry backoff: retry_base * 2**attempt seconds, capped, plus random jitter
+        self.retry_base = 1.0
+        self.retry_cap = 30.0
+        self.retry_jitter = 0.5
+        
+        # Set to wake the control loop for shutdown
+        self._stop = threading.Event()
+        
         logger.info("Ground Station Controller initialized")
     
     def get_ground_station_coordinates(self) -> tuple:
         """Get current ground station coordinates (GPS or static)"""
         if self.use_gps and self.gps:
-            position = self.gps.get_position()
+            position = self.gps.get_filtered_position()
             if position['valid']:
                 return position['lat'], position['lon']
             else:
@@ -63,19 +81,17 @@ class GroundStationController:
             timestamp = time.time()
             lat, lon = self.get_ground_station_coordinates()
             
-            init_packet = f"INIT,{timestamp:.2f},{lat:.6f},{lon:.6f}"
+            init_packet = INIT_PACKET_FORMAT % (timestamp, lat, lon)
             
-            success = self.lora.send_packet(init_packet)
+            self._discard_stale_replies()
+            success = self.lora.send_message(init_packet)
             
             if success:
-                logger.info("TX", init_packet, True)
-                
-                # Wait for UAV acknowledgment
-                response = self.lora.wait_for_response(timeout=self.response_timeout)
+                # Wait for UAV acknowledgment; wakes as soon as the UART has data
+                response = self.lora.receive_message(timeout=self.response_timeout)
                 
                 if response:
-                    logger.info("RX", response, True)
-                    logger.info("INIT packet acknowledged by UAV")
+                    logger.info("INIT packet acknowledged by UAV: %s", response)
                     return True
                 else:
                     logger.warning("No response to INIT packet")
@@ -104,107 +120,120 @@ class GroundStationController:
             
             # Create wind packet
             timestamp = time.time()
-            wind_packet = f"WIND,{timestamp:.2f},{wind_data['direction']:.1f},{wind_data['speed']:.1f}"
+            wind_packet = WIND_PACKET_FORMAT % (timestamp, wind_data['direction'], wind_data['speed'])
             
-            # Send with retries
+            # Send with retries, bounded as a whole by transaction_timeout
+            deadline = time.monotonic() + self.transaction_timeout
             for attempt in range(self.max_retries + 1):
-                start_time = time.time()
+                if self._stop.is_set():
+                    logger.info("Shutdown requested, abandoning wind packet retries")
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Wind packet transaction timed out after {attempt} attempts")
+                    break
                 
-                success = self.lora.send_packet(wind_packet)
+                # A reply to an earlier attempt that arrived after its timeout
+                # must not be counted as this attempt's reply
+                self._discard_stale_replies()
+                success = self.lora.send_message(wind_packet)
+                # RTT runs from the end of the write, not packet preparation
+                tx_start = time.perf_counter_ns()
                 result['packet_sent'] = success
                 result['retries'] = attempt
                 
                 if not success:
                     logger.error(f"Failed to send wind packet (attempt {attempt + 1})")
-                    if attempt < self.max_retries:
-                        time.sleep(2)  # Wait before retry
+                    if attempt < self.max_retries and not self._retry_wait(attempt):
                         continue
                     else:
                         break
                 
-                logger.info("TX", wind_packet, True)
-                
-                # Wait for UAV response
-                response = self.lora.wait_for_response(timeout=self.response_timeout)
+                # Wait for UAV response; wakes as soon as the UART has data
+                response = self.lora.receive_message(timeout=min(self.response_timeout, remaining))
                 
                 if response:
-                    end_time = time.time()
                     result['response_received'] = True
                     result['response_packet'] = response
-                    result['round_trip_ms'] = int((end_time - start_time) * 1000)
-                    
-                    logger.info("RX", response, True)
-                    
-                    # Log successful transaction
-                    log_entry = {
-                        "timestamp": datetime.utcnow().isoformat() + "Z",
-                        "event": "TX_WIND",
-                        "packet": wind_packet,
-                        "retries": attempt,
-                        "response_received": True,
-                        "response_packet": response,
-                        "round_trip_ms": result['round_trip_ms'],
-                        "wind_data": wind_data
-                    }
-                    logger.info(log_entry)
-                    
+                    result['round_trip_ms'] = (time.perf_counter_ns() - tx_start) // 1_000_000
                     break
                 else:
                     logger.warning(f"No response to wind packet (attempt {attempt + 1})")
-                    if attempt < self.max_retries:
-                        time.sleep(2)  # Wait before retry
+                    if attempt < self.max_retries and self._retry_wait(attempt):
+                        break
             
-            # Log failed transaction if no response received
-            if not result['response_received']:
-                log_entry = {
-                    "timestamp": datetime.utcnow().isoformat() + "Z",
-                    "event": "TX_WIND",
-                    "packet": wind_packet,
-                    "retries": result['retries'],
-                    "response_received": False,
-                    "response_packet": None,
-                    "round_trip_ms": None,
-                    "wind_data": wind_data
-                }
-                logger.info(log_entry)
+            # One log entry per transaction, covering TX, RX, retries and RTT
+            log_entry = {
+                "timestamp": utc_timestamp(),
+                "event": "TX_WIND",
+                "packet": wind_packet,
+                "retries": result['retries'],
+                "response_received": result['response_received'],
+                "response_packet": result['response_packet'],
+                "round_trip_ms": result['round_trip_ms'],
+                "wind_data": wind_data
+            }
+            logger.info(log_entry)
             
         except Exception as e:
             logger.error(f"Error in wind data transmission: {e}")
         
         return result
     
+    def _discard_stale_replies(self):
+        """Drop UAV replies that arrived after their request had timed out"""
+        stale = self.lora.discard_pending()
+        if stale:
+            logger.warning("Discarded %d late LoRa replies before sending", stale)
+    
+    def _retry_wait(self, attempt: int) -> bool:
+        """
+        Back off exponentially with jitter before the next retry
+        
+        Returns:
+            True if shutdown was requested during the wait
+        """
+        delay = min(self.retry_cap, self.retry_base * (2 ** attempt))
+        return self._stop.wait(delay + random.uniform(0, self.retry_jitter))
+    
     def run(self):
         """Main ground station control loop"""
         logger.info("Starting ground station control loop")
         
+        # Ctrl-C / SIGTERM wake the scheduled wait instead of interrupting a transmission
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self._stop.set())
+        
         try:
             # Send initial packet
             init_success = self.send_init_packet()
             if not init_success:
                 logger.warning("Failed to initialize communication with UAV")
             
-            # Main transmission loop
-            last_transmission = 0
+            # Main transmission loop, sleeping until the next scheduled transmission
+            next_tx = time.monotonic()
             
-            while True:
-                current_time = time.time()
-                
-                # Check if it's time to send wind data
-                if current_time - last_transmission >= self.transmission_interval:
-                    result = self.send_wind_data()
-                    last_transmission = current_time
-                    
-                    # Print summary
-                    if result['response_received']:
-                        print(f"Wind data sent successfully (RTT: {result['round_trip_ms']}ms, Retries: {result['retries']})")
-                    else:
-                        print(f"Wind data transmission failed after {result['retries']} retries")
+            while not self._stop.is_set():
+                result = self.send_wind_data()
                 
-                # Small delay to prevent CPU overload
-                time.sleep(0.1)
+                # Summary goes through the logger's writer thread, not stdout directly
+                if result['response_received']:
+                    logger.info("Wind data sent successfully (RTT: %sms, Retries: %s)",
+                                result['round_trip_ms'], result['retries'])
+                else:
+                    logger.warning("Wind data transmission failed after %s retries", result['retries'])
                 
-        except KeyboardInterrupt:
+                next_tx += self.transmission_interval
+                now = time.monotonic()
+                if next_tx < now:
+                    # Retries overran the slot; restart the schedule rather than bursting
+                    next_tx = now
+                if self._stop.wait(next_tx - now):
+                    break
+            
             logger.info("Ground station stopped by user")
+            
         except Exception as e:
             logger.error(f"Ground station control loop error: {e}")
         finally:
@@ -213,6 +242,7 @@ class GroundStationController:
     def shutdown(self):
         """Clean shutdown of ground station"""
         logger.info("Shutting down ground station")
+        self._stop.set()
         
         try:
             self.wind_sensor.close()
@@ -3,5 +3,6 @@ Ground Station Sensors Package
 """
 
 from .gps_reader import GPSReader
-from .wind_vane_reader import WindSensorReader
+from .wind_vane_reader import WindVaneReader
 from .compass_reader import CompassReader
+from .i2c_bus import get_bus, release_bus
@@ -6,17 +6,87 @@ Handles calibration storage and retrieval with proximity tolerance
 import json
 import time
 import os
-import glob
-from typing import Dict, Optional, Tuple
+import re
+import struct
+import numpy as np
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Proximity tolerance for finding nearby calibrations
 PROXIMITY_TOLERANCE_DEGREES = 0.005  # ~500m at equator
 CALIBRATION_DIR = '/home/pi/Desktop/gps_calibrations'
 
+# Pull the location straight out of a calibration file's bytes; "lat"/"lon"
+# only appear in its location block
+_LAT_RE = re.compile(rb'"lat"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)')
+_LON_RE = re.compile(rb'"lon"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)')
+
+# HMC5883L data output registers: X, Z, Y as big-endian int16, read in one
+# auto-incrementing burst starting at register 0x03
+MAG_DATA_REGISTER = 0x03
+_MAG_XZY = struct.Struct('>hhh')
+
+# Config A (0x70) sets an 8-sample average at 15 Hz output; sampling faster
+# would only repeat readings
+MAG_SAMPLE_INTERVAL = 1 / 15
+
+def read_magnetometer(i2c_conn, compass_addr) -> Tuple[int, int, int]:
+    """Read raw (x, y, z) magnetometer counts in a single I2C transaction"""
+    data = i2c_conn.read_i2c_block_data(compass_addr, MAG_DATA_REGISTER, 6)
+    x, z, y = _MAG_XZY.unpack(bytes(data))
+    return x, y, z
+
 class CompassCalibrationManager:
     def __init__(self):
         self.calibration_dir = CALIBRATION_DIR
         os.makedirs(self.calibration_dir, exist_ok=True)
+        
+        # Location of every saved calibration, keyed by file path, so proximity
+        # lookups don't re-open and parse each file; kept current by save_calibration
+        self._index: Dict[str, Tuple[float, float]] = {}
+        self._build_index()
+        
+        # Parsed calibration files for list_calibrations, keyed by path and
+        # reused while the file's mtime is unchanged
+        self._list_cache: Dict[str, Tuple[int, Dict]] = {}
+    
+    def _scan_calibrations(self) -> List[os.DirEntry]:
+        """Calibration files in the calibration directory, sorted by name"""
+        with os.scandir(self.calibration_dir) as it:
+            entries = [entry for entry in it
+                       if entry.name.startswith('compass_cal_') and entry.name.endswith('.json')]
+        entries.sort(key=attrgetter('name'))
+        return entries
+    
+    def _build_index(self):
+        """Read the location of each calibration file once"""
+        for entry in self._scan_calibrations():
+            cal_file = entry.path
+            try:
+                # No full JSON parse: the index only needs the coordinates
+                with open(cal_file, 'rb') as f:
+                    raw = f.read()
+                lat_match = _LAT_RE.search(raw)
+                lon_match = _LON_RE.search(raw)
+                if lat_match and lon_match:
+                    self._index[cal_file] = (float(lat_match.group(1)), float(lon_match.group(1)))
+            except:
+                continue
+    
+    @staticmethod
+    def _read_json(cal_file: str) -> Dict:
+        """Parse a calibration file"""
+        if ORJSON_AVAILABLE:
+            with open(cal_file, 'rb') as f:
+                return orjson.loads(f.read())
+        with open(cal_file, 'r') as f:
+            return json.load(f)
     
     def load_calibration(self, location_id: str = None, current_lat: float = None, current_lon: float = None) -> Dict:
         """Load calibration with proximity tolerance"""
@@ -55,6 +125,7 @@ class CompassCalibrationManager:
             cal_file = self._get_calibration_file(location_id)
             with open(cal_file, 'w') as f:
                 json.dump(cal_data, f, indent=2)
+            self._index[cal_file] = (cal_data['location']['lat'], cal_data['location']['lon'])
             print(f"Calibration saved: {location_id}")
             return True
         except Exception as e:
@@ -63,41 +134,28 @@ class CompassCalibrationManager:
     
     def _find_nearby_calibration(self, lat: float, lon: float) -> Optional[str]:
         """Find calibration within proximity tolerance"""
-        cal_files = glob.glob(f"{self.calibration_dir}/compass_cal_*.json")
-        
-        for cal_file in cal_files:
-            try:
-                with open(cal_file, 'r') as f:
-                    cal_data = json.load(f)
-                    location = cal_data.get('location', {})
-                    cal_lat = location.get('lat')
-                    cal_lon = location.get('lon')
-                    
-                    if cal_lat is not None and cal_lon is not None:
-                        # Check if within tolerance
-                        lat_diff = abs(lat - cal_lat)
-                        lon_diff = abs(lon - cal_lon)
-                        
-                        if lat_diff <= PROXIMITY_TOLERANCE_DEGREES and lon_diff <= PROXIMITY_TOLERANCE_DEGREES:
-                            distance_m = ((lat_diff ** 2 + lon_diff ** 2) ** 0.5) * 111000
-                            print(f"Found nearby calibration ({distance_m:.0f}m away)")
-                            return cal_file
-            except:
-                continue
+        for cal_file, (cal_lat, cal_lon) in self._index.items():
+            # Check if within tolerance
+            lat_diff = abs(lat - cal_lat)
+            lon_diff = abs(lon - cal_lon)
+            
+            if lat_diff <= PROXIMITY_TOLERANCE_DEGREES and lon_diff <= PROXIMITY_TOLERANCE_DEGREES:
+                distance_m = ((lat_diff ** 2 + lon_diff ** 2) ** 0.5) * 111000
+                print(f"Found nearby calibration ({distance_m:.0f}m away)")
+                return cal_file
         
         return None
     
     def _load_file(self, cal_file: str, source: str) -> Dict:
         """Load calibration from file"""
         try:
-            with open(cal_file, 'r') as f:
-                cal_data = json.load(f)
-                print(f"Loaded calibration from {source}")
-                return {
-                    'offset': cal_data.get('offset', {'x': 0, 'y': 0, 'z': 0}),
-                    'scale': cal_data.get('scale', {'x': 1.0, 'y': 1.0, 'z': 1.0}),
-                    'declination': cal_data.get('declination', 0.0)
-                }
+            cal_data = self._read_json(cal_file)
+            print(f"Loaded calibration from {source}")
+            return {
+                'offset': cal_data.get('offset', {'x': 0, 'y': 0, 'z': 0}),
+                'scale': cal_data.get('scale', {'x': 1.0, 'y': 1.0, 'z': 1.0}),
+                'declination': cal_data.get('declination', 0.0)
+            }
         except Exception as e:
             print(f"Failed to load calibration: {e}")
             return {
@@ -108,27 +166,34 @@ class CompassCalibrationManager:
     
     def list_calibrations(self) -> None:
         """List all calibrations"""
-        cal_files = glob.glob(f"{self.calibration_dir}/compass_cal_*.json")
+        entries = self._scan_calibrations()
         
-        if not cal_files:
+        if not entries:
             print("No calibrations found")
             return
         
         print("Available calibrations:")
-        for cal_file in sorted(cal_files):
+        for entry in entries:
             try:
-                with open(cal_file, 'r') as f:
-                    cal_data = json.load(f)
-                    location = cal_data.get('location', {})
-                    timestamp = cal_data.get('timestamp', 0)
-                    
-                    print(f"  {location.get('id', 'Unknown')}")
-                    if location.get('lat') and location.get('lon'):
-                        print(f"    GPS: {location['lat']:.4f}, {location['lon']:.4f}")
-                    print(f"    Date: {time.ctime(timestamp)}")
-                    print()
+                # Only re-parse files that changed since the last listing
+                mtime = entry.stat().st_mtime_ns
+                cached = self._list_cache.get(entry.path)
+                if cached is not None and cached[0] == mtime:
+                    cal_data = cached[1]
+                else:
+                    cal_data = self._read_json(entry.path)
+                    self._list_cache[entry.path] = (mtime, cal_data)
+                
+                location = cal_data.get('location', {})
+                timestamp = cal_data.get('timestamp', 0)
+                
+                print(f"  {location.get('id', 'Unknown')}")
+                if location.get('lat') and location.get('lon'):
+                    print(f"    GPS: {location['lat']:.4f}, {location['lon']:.4f}")
+                print(f"    Date: {time.ctime(timestamp)}")
+                print()
             except:
-                print(f"  {os.path.basename(cal_file)} - Error reading file")
+                print(f"  {entry.name} - Error reading file")
     
     def _get_calibration_file(self, location_id: str) -> str:
         """Get calibration file path"""
@@ -148,36 +213,31 @@ class CompassCalibrator:
         print("3... 2... 1... GO!")
         time.sleep(3)
         
-        min_vals = [32767, 32767, 32767]
-        max_vals = [-32768, -32768, -32768]
-        start_time = time.time()
+        # Samples are stored as-is and reduced to min/max once at the end
+        buf = np.empty((int(duration / MAG_SAMPLE_INTERVAL) + 1, 3), dtype=np.int16)
+        start_time = time.monotonic()
         samples = 0
         
-        while time.time() - start_time < duration:
+        while time.monotonic() - start_time < duration and samples < len(buf):
             try:
                 # Read magnetometer data
-                data = [self.i2c_conn.read_byte_data(self.compass_addr, 0x03 + i) for i in range(6)]
-                
-                # Convert to signed values (X, Y, Z)
-                xyz = []
-                for i in range(0, 6, 2):
-                    val = (data[i] << 8) | data[i+1]
-                    if val > 32767: val -= 65536
-                    xyz.append(val)
-                
-                # Track min/max
-                for i in range(3):
-                    min_vals[i] = min(min_vals[i], xyz[i])
-                    max_vals[i] = max(max_vals[i], xyz[i])
+                buf[samples] = read_magnetometer(self.i2c_conn, self.compass_addr)
                 
                 samples += 1
                 if samples % 50 == 0:
-                    remaining = duration - (time.time() - start_time)
+                    remaining = duration - (time.monotonic() - start_time)
                     print(f"Calibrating... {remaining:.1f}s remaining")
                     
             except:
                 pass
-            time.sleep(0.1)
+            time.sleep(MAG_SAMPLE_INTERVAL)
+        
+        if samples:
+            min_vals = buf[:samples].min(axis=0).tolist()
+            max_vals = buf[:samples].max(axis=0).tolist()
+        else:
+            min_vals = [32767, 32767, 32767]
+            max_vals = [-32768, -32768, -32768]
         
         # Calculate calibration
         offset = {}
@@ -6,22 +6,21 @@ Compass heading via I2C (separate from GPS)
 import time
 import threading
 import math
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 from config import COMPASS_I2C_BUS, COMPASS_I2C_ADDRESS, SENSOR_READ_INTERVAL
 from shared import SimpleLogger as logger
-from .compass_calibration import CompassCalibrationManager
+from .compass_calibration import CompassCalibrationManager, read_magnetometer
+from .i2c_bus import I2C_AVAILABLE, get_bus, release_bus
 
-try:
-    import smbus
-    I2C_AVAILABLE = True
-except ImportError:
-    I2C_AVAILABLE = False
-    logger.warning("smbus not available, compass functionality disabled")
+# Heading sample period
+COMPASS_READ_INTERVAL = 0.2
 
 class CompassReader:
     def __init__(self, i2c_bus=COMPASS_I2C_BUS, compass_addr=COMPASS_I2C_ADDRESS):
@@ -29,9 +28,11 @@ class CompassReader:
         self.i2c_bus = i2c_bus
         self.compass_addr = compass_addr
         self.i2c_conn = None
+        self._bus_lock = None
         self.running = False
         
-        # Data storage
+        # Data storage; the reader thread rebinds a fresh dict on each update
+        # instead of mutating it, so get_compass needs no lock
         self.latest_compass = {
             'heading': 0.0,
             'valid': False,
@@ -42,17 +43,24 @@ class CompassReader:
         self.mag_offset = {'x': 0, 'y': 0, 'z': 0}
         self.mag_scale = {'x': 1.0, 'y': 1.0, 'z': 1.0}
         self.declination = 0.0
+        self._set_calibration_terms()
         
-        self.lock = threading.Lock()
-        self.cal_manager = CompassCalibrationManager()
+        # Created on first load_calibration(); it touches the calibration directory
+        self._cal_manager = None
+        
+        # Set by close() to wake the reader thread out of its wait
+        self._stop = threading.Event()
         
         if I2C_AVAILABLE:
             self.connect()
+        else:
+            logger.warning("smbus not available, compass functionality disabled")
     
     def connect(self):
         """Connect to compass via I2C"""
         try:
-            self.i2c_conn = smbus.SMBus(self.i2c_bus)
+            # The bus handle is shared with any other sensor on the same bus
+            self.i2c_conn, self._bus_lock = get_bus(self.i2c_bus)
             self._init_compass()
             logger.info(f"Compass connected on I2C bus {self.i2c_bus}")
             
@@ -63,64 +71,79 @@ class CompassReader:
                 
         except Exception as e:
             logger.error(f"Compass connection failed: {e}")
+            if self.i2c_conn:
+                release_bus(self.i2c_bus)
             self.i2c_conn = None
     
     def _init_compass(self):
         """Initialize HMC5883L compass"""
-        self.i2c_conn.write_byte_data(self.compass_addr, 0x00, 0x70)  # Config A
-        self.i2c_conn.write_byte_data(self.compass_addr, 0x01, 0x20)  # Config B
-        self.i2c_conn.write_byte_data(self.compass_addr, 0x02, 0x00)  # Mode
+        with self._bus_lock:
+            self.i2c_conn.write_byte_data(self.compass_addr, 0x00, 0x70)  # Config A
+            self.i2c_conn.write_byte_data(self.compass_addr, 0x01, 0x20)  # Config B
+            self.i2c_conn.write_byte_data(self.compass_addr, 0x02, 0x00)  # Mode
         time.sleep(0.1)
         print("Compass initialized")
     
     def _read_compass(self):
-        """Read compass data continuously"""
+        """Read compass data continuously on a fixed monotonic schedule"""
+        next_t = time.monotonic()
         while self.running and self.i2c_conn:
             try:
                 heading = self._get_compass_heading()
-                with self.lock:
-                    self.latest_compass.update({
-                        'heading': heading if heading is not None else 0.0,
-                        'valid': heading is not None,
-                        'timestamp': time.time()
-                    })
+                self.latest_compass = {
+                    'heading': heading if heading is not None else 0.0,
+                    'valid': heading is not None,
+                    'timestamp': time.time()
+                }
             except Exception as e:
-                with self.lock:
-                    self.latest_compass['valid'] = False
-            time.sleep(0.2)  # Read every 200ms
+                self.latest_compass = {**self.latest_compass, 'valid': False}
+            
+            # Sleep to the next slot so the read time doesn't accumulate as drift
+            next_t += COMPASS_READ_INTERVAL
+            now = time.monotonic()
+            if next_t < now:
+                # Fell behind (e.g. a slow bus); resync rather than burst
+                next_t = now + COMPASS_READ_INTERVAL
+            if self._stop.wait(next_t - now):
+                break
+    
+    def _set_calibration_terms(self):
+        """Flatten the calibration dicts into per-axis tuples for the read path"""
+        # Rebound as one tuple so the reader thread never sees a half-updated set
+        self._cal_terms = (
+            tuple(self.mag_offset[axis] for axis in 'xyz'),
+            tuple(self.mag_scale[axis] for axis in 'xyz'),
+            self.declination
+        )
+    
+    def _read_calibrated(self) -> Tuple[float, float, float]:
+        """Read the magnetometer once and apply offset/scale calibration"""
+        (ox, oy, oz), (sx, sy, sz), _ = self._cal_terms
+        with self._bus_lock:
+            x, y, z = read_magnetometer(self.i2c_conn, self.compass_addr)
+        return (x - ox) * sx, (y - oy) * sy, (z - oz) * sz
     
     def _get_compass_heading(self) -> Optional[float]:
         """Get calibrated compass heading"""
         try:
-            # Read raw magnetometer data
-            data = [self.i2c_conn.read_byte_data(self.compass_addr, 0x03 + i) for i in range(6)]
+            x_cal, y_cal, _ = self._read_calibrated()
             
-            # Convert to signed 16-bit values (X, Z, Y order for HMC5883L)
-            x = (data[0] << 8) | data[1]
-            if x > 32767: x -= 65536
-            y = (data[4] << 8) | data[5]  # Y is at offset 4,5
-            if y > 32767: y -= 65536
-            
-            # Apply calibration
-            x_cal = (x - self.mag_offset['x']) * self.mag_scale['x']
-            y_cal = (y - self.mag_offset['y']) * self.mag_scale['y']
-            
-            # Calculate heading
-            heading = math.atan2(y_cal, x_cal) * 180.0 / math.pi + self.declination
-            
-            # Normalize to 0-360
-            return heading % 360
+            # Calculate heading, normalised to 0-360
+            return (math.degrees(math.atan2(y_cal, x_cal)) + self._cal_terms[2]) % 360
         except:
             return None
     
     def load_calibration(self, location_id: str = None, lat: float = None, lon: float = None) -> bool:
         """Load compass calibration"""
         try:
-            calibration = self.cal_manager.load_calibration(location_id, lat, lon)
+            if self._cal_manager is None:
+                self._cal_manager = CompassCalibrationManager()
+            calibration = self._cal_manager.load_calibration(location_id, lat, lon)
             
             self.mag_offset = calibration['offset']
             self.mag_scale = calibration['scale'] 
             self.declination = calibration['declination']
+            self._set_calibration_terms()
             
             print("Compass calibration loaded")
             return True
@@ -130,8 +153,7 @@ class CompassReader:
     
     def get_compass(self) -> Dict:
         """Get current compass heading"""
-        with self.lock:
-            return self.latest_compass.copy()
+        return self.latest_compass.copy()
     
     def get_raw_magnetometer(self) -> Optional[Dict]:
         """Get raw magnetometer readings for calibration"""
@@ -139,16 +161,8 @@ class CompassReader:
             return None
             
         try:
-            data = [self.i2c_conn.read_byte_data(self.compass_addr, 0x03 + i) for i in range(6)]
-            
-            # Convert to signed values
-            x = (data[0] << 8) | data[1]
-            if x > 32767: x -= 65536
-            y = (data[4] << 8) | data[5]
-            if y > 32767: y -= 65536
-            z = (data[2] << 8) | data[3]
-            if z > 32767: z -= 65536
-            
+            with self._bus_lock:
+                x, y, z = read_magnetometer(self.i2c_conn, self.compass_addr)
             return {'x': x, 'y': y, 'z': z}
         except:
             return None
@@ -168,8 +182,10 @@ class CompassReader:
     def close(self):
         """Close compass connection"""
         self.running = False
+        self._stop.set()
         if self.i2c_conn:
-            self.i2c_conn.close()
+            release_bus(self.i2c_bus)
+            self.i2c_conn = None
         logger.info("Compass reader closed")
 
 # Test script
@@ -182,8 +198,8 @@ if __name__ == "__main__":
             print("Compass connected. Reading for 30 seconds...")
             print("-" * 40)
             
-            start_time = time.time()
-            while time.time() - start_time < 30:
+            start_time = time.monotonic()
+            while time.monotonic() - start_time < 30:
                 compass_data = compass.get_compass()
                 status = "Valid" if compass_data['valid'] else "Invalid"
                 
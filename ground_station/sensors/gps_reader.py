@@ -4,16 +4,33 @@ GPS positioning via UART (Serial connection only)
 """
 
 import serial
+import select
 import time
+import numpy as np
 import threading
 from typing import Dict
 import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 from config import GPS_PORT, GPS_BAUDRATE, GPS_TIMEOUT, SENSOR_READ_INTERVAL
 from shared import SimpleLogger as logger
+from shared import set_low_latency
+
+# NMEA minutes to degrees
+_INV_60 = 1.0 / 60.0
+# Only GGA sentences are parsed; everything else is skipped on this prefix check
+_GGA_PREFIXES = (b'$GPGGA', b'$GNGGA')
+
+# Bytes taken per read; a full 1 Hz burst of NMEA sentences is well under this
+GPS_READ_SIZE = 1024
+# NMEA sentences are at most 82 characters; more than this without a newline is garbage
+MAX_NMEA_BUFFER = 1024
+# Number of recent fixes the median position is taken over
+GPS_MEDIAN_WINDOW = 9
 
 class GPSReader:
     def __init__(self, port=GPS_PORT, baudrate=GPS_BAUDRATE):
@@ -23,19 +40,27 @@ class GPSReader:
         self.serial_conn = None
         self.running = False
         
-        # Data storage
+        # Data storage; _parse_gga rebinds a fresh dict on each sentence
+        # instead of mutating it, so get_position needs no lock
         self.latest_position = {
             'lat': 0.0, 'lon': 0.0, 'alt': 0.0, 'satellites': 0, 'hdop': 0.0,
             'valid': False, 'timestamp': 0.0, 'utc_time': None
         }
         
-        self.lock = threading.Lock()
+        # Ring of the last GPS_MEDIAN_WINDOW valid (lat, lon) fixes for get_filtered_position
+        self._fix_ring = np.zeros((GPS_MEDIAN_WINDOW, 2))
+        self._fix_count = 0
+        
+        # Set while the latest sentence carries a valid fix; wait_for_fix blocks on it
+        self._fix_event = threading.Event()
+        
         self.connect()
     
     def connect(self):
         """Connect to GPS via serial"""
         try:
             self.serial_conn = serial.Serial(self.port, self.baudrate, timeout=1)
+            set_low_latency(self.serial_conn)
             logger.info(f"GPS connected on {self.port}")
             
             # Start background reading thread
@@ -50,20 +75,53 @@ class GPSReader:
     
     def _read_gps(self):
         """Read GPS data continuously"""
+        # Bound once; every NMEA sentence goes through these
+        fd = self.serial_conn.fileno()
+        scratch = memoryview(bytearray(GPS_READ_SIZE))
+        parse = self._parse_gga
+        gga_prefixes = _GGA_PREFIXES
+        checksum_ok = self._checksum_ok
+        
+        # Bytes received but not yet split into sentences
+        buf = bytearray()
+        
         while self.running and self.serial_conn:
             try:
-                if self.serial_conn.in_waiting > 0:
-                    line = self.serial_conn.readline().decode('ascii', errors='ignore').strip()
-                    if line.startswith(('$GPGGA', '$GNGGA')):
-                        self._parse_gga(line)
+                # Sleep in select() until the UART has data (or the 1 s timeout),
+                # then take everything buffered with a single read on the fd
+                ready, _, _ = select.select([fd], [], [], 1.0)
+                if not ready:
+                    continue
+                n = os.readv(fd, [scratch])
+                if n == 0:
+                    raise serial.SerialException("GPS disconnected (readable but no data)")
+                buf += scratch[:n]
+                
+                start = 0
+                end = buf.find(b'\n')
+                while end >= 0:
+                    line = bytes(buf[start:end + 1])
+                    # Corrupted sentences are dropped before any field parsing
+                    if line.startswith(gga_prefixes) and checksum_ok(line):
+                        parse(line)
+                    start = end + 1
+                    end = buf.find(b'\n', start)
+                del buf[:start]
+                
+                if len(buf) > MAX_NMEA_BUFFER:
+                    # No line ending in sight; drop the noise
+                    buf.clear()
             except:
-                pass
-            time.sleep(SENSOR_READ_INTERVAL)
+                if not self.running:
+                    break
+                # Back off instead of spinning on a persistent port error
+                time.sleep(SENSOR_READ_INTERVAL)
     
-    def _parse_gga(self, sentence):
-        """Parse GGA sentence for position and time"""
+    def _parse_gga(self, sentence: bytes):
+        """Parse a raw GGA sentence for position and time"""
         try:
-            parts = sentence.split(',')
+            # float()/int() accept ASCII bytes, so fields are never decoded
+            parts = sentence.split(b',')
             if len(parts) < 15:
                 return
             
@@ -71,56 +129,82 @@ class GPSReader:
             time_str = parts[1]
             utc_time = None
             if time_str:
-                h, m, s = int(time_str[:2]), int(time_str[2:4]), float(time_str[4:])
-                utc_time = f"{h:02d}:{m:02d}:{s:05.2f}"
+                # hhmmss.ss: hours and minutes are already zero-padded digits
+                # (the checksum has vouched for them), only seconds need parsing
+                utc_time = "%s:%s:%05.2f" % (time_str[:2].decode(), time_str[2:4].decode(), float(time_str[4:]))
             
-            # Extract position data
-            lat_str, lat_dir = parts[2], parts[3]
-            lon_str, lon_dir = parts[4], parts[5]
+            # Extract fix status first; coordinates are only parsed with a fix
             fix_quality = int(parts[6]) if parts[6] else 0
             satellites = int(parts[7]) if parts[7] else 0
-            hdop = float(parts[8]) if parts[8] else 0.0
-            altitude = float(parts[9]) if parts[9] else 0.0
+            lat_str, lon_str = parts[2], parts[4]
             
-            with self.lock:
-                if lat_str and lon_str and fix_quality > 0:
-                    # Valid fix - update position
-                    lat = self._convert_to_decimal(lat_str, lat_dir)
-                    lon = self._convert_to_decimal(lon_str, lon_dir)
-                    self.latest_position.update({
-                        'lat': lat, 'lon': lon, 'alt': altitude, 'hdop': hdop,
-                        'satellites': satellites, 'valid': True,
-                        'utc_time': utc_time, 'timestamp': time.time()
-                    })
-                else:
-                    # Invalid fix - keep position, update status
-                    self.latest_position.update({
-                        'satellites': satellites, 'valid': False,
-                        'utc_time': utc_time, 'timestamp': time.time()
-                    })
+            if lat_str and lon_str and fix_quality > 0:
+                # Valid fix - update position
+                lat = self._parse_lat(lat_str, parts[3])
+                lon = self._parse_lon(lon_str, parts[5])
+                self._fix_ring[self._fix_count % GPS_MEDIAN_WINDOW] = (lat, lon)
+                self._fix_count += 1
+                self.latest_position = {
+                    'lat': lat,
+                    'lon': lon,
+                    'alt': float(parts[9]) if parts[9] else 0.0,
+                    'hdop': float(parts[8]) if parts[8] else 0.0,
+                    'satellites': satellites, 'valid': True,
+                    'utc_time': utc_time, 'timestamp': time.time()
+                }
+                self._fix_event.set()
+            else:
+                # Invalid fix - keep position, update status
+                self.latest_position = {
+                    **self.latest_position,
+                    'satellites': satellites, 'valid': False,
+                    'utc_time': utc_time, 'timestamp': time.time()
+                }
+                self._fix_event.clear()
         except:
-            with self.lock:
-                self.latest_position.update({'valid': False, 'timestamp': time.time()})
+            self.latest_position = {**self.latest_position, 'valid': False, 'timestamp': time.time()}
+            self._fix_event.clear()
     
-    def _convert_to_decimal(self, coord_str, direction):
-        """Convert NMEA coordinate to decimal degrees"""
-        try:
-            dot_pos = coord_str.index('.')
-            if dot_pos >= 4:  # Longitude
-                degrees, minutes = float(coord_str[:3]), float(coord_str[3:])
-            else:  # Latitude
-                degrees, minutes = float(coord_str[:2]), float(coord_str[2:])
-            
-            decimal = degrees + minutes / 60.0
-            return -decimal if direction in ['S', 'W'] else decimal
-        except:
-            return 0.0
+    @staticmethod
+    def _parse_lat(field: bytes, hemisphere: bytes) -> float:
+        """Convert an NMEA latitude (DDMM.mmmm) to decimal degrees"""
+        value = float(field[:2]) + float(field[2:]) * _INV_60
+        return -value if hemisphere == b'S' else value
     
+    @staticmethod
+    def _parse_lon(field: bytes, hemisphere: bytes) -> float:
+        """Convert an NMEA longitude (DDDMM.mmmm) to decimal degrees"""
+        value = float(field[:3]) + float(field[3:]) * _INV_60
+        return -value if hemisphere == b'W' else value
+    
+    @staticmethod
+    def _checksum_ok(line: bytes) -> bool:
+        """Check a raw NMEA sentence against its *HH checksum"""
+        star = line.rfind(b'*')
+        if star < 1:
+            return False
+        checksum = 0
+        for byte in line[1:star]:
+            checksum ^= byte
+        try:
+            return checksum == int(line[star + 1:star + 3], 16)
+        except ValueError:
+            return False
     
     def get_position(self) -> Dict:
         """Get current GPS position"""
-        with self.lock:
-            return self.latest_position.copy()
+        return self.latest_position.copy()
+    
+    def get_filtered_position(self) -> Dict:
+        """Get current GPS position with lat/lon replaced by the median of recent fixes"""
+        pos = self.get_position()
+        filled = min(self._fix_count, GPS_MEDIAN_WINDOW)
+        if pos['valid'] and filled:
+            # Median rather than mean: a stationary receiver still throws
+            # occasional fixes tens of metres out
+            lat, lon = np.median(self._fix_ring[:filled], axis=0)
+            pos['lat'], pos['lon'] = float(lat), float(lon)
+        return pos
     
     def get_gps_time(self) -> Dict:
         """Get GPS UTC time"""
@@ -133,12 +217,8 @@ class GPSReader:
     
     def wait_for_fix(self, timeout=GPS_TIMEOUT) -> bool:
         """Wait for GPS fix"""
-        start = time.time()
-        while time.time() - start < timeout:
-            if self.get_position()['valid']:
-                return True
-            time.sleep(1)
-        return False
+        # Wakes as soon as _parse_gga sees a valid fix
+        return self._fix_event.wait(timeout)
     
     def get_status(self) -> Dict:
         """Get GPS status"""
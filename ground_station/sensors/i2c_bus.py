@@ -0,0 +1,39 @@
+"""
+Shared I2C Bus Handles
+One smbus.SMBus and lock per bus number, shared by every sensor on that bus
+"""
+
+import threading
+from importlib.util import find_spec
+from typing import Dict, Tuple
+
+# smbus itself is only imported when a bus is first opened, so importing the
+# sensor modules stays cheap on machines without I2C
+I2C_AVAILABLE = find_spec('smbus') is not None
+
+# bus number -> [SMBus, bus lock, user count]
+_buses: Dict[int, list] = {}
+_buses_lock = threading.Lock()
+
+def get_bus(bus_number: int) -> Tuple["smbus.SMBus", threading.Lock]:
+    """Open (or reuse) the handle for an I2C bus; hold the returned lock around each transaction"""
+    with _buses_lock:
+        entry = _buses.get(bus_number)
+        if entry is None:
+            import smbus
+            entry = [smbus.SMBus(bus_number), threading.Lock(), 0]
+            _buses[bus_number] = entry
+        entry[2] += 1
+        return entry[0], entry[1]
+
+def release_bus(bus_number: int):
+    """Drop one user of a bus; the handle is closed when the last user releases it"""
+    with _buses_lock:
+        entry = _buses.get(bus_number)
+        if entry is None:
+            return
+        entry[2] -= 1
+        if entry[2] <= 0:
+            del _buses[bus_number]
+            with entry[1]:
+                entry[0].close()
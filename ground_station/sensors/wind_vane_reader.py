@@ -4,6 +4,7 @@ Lightweight implementation with background threading
 """
 
 import time
+import array
 import serial
 import threading
 from typing import Dict, Optional
@@ -11,9 +12,30 @@ import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 from config import WIND_VANE_PORT, WIND_VANE_BAUDRATE, SENSOR_READ_INTERVAL
 from shared import SimpleLogger as logger
+from shared import set_low_latency
+
+def _build_crc16_table():
+    """Modbus CRC16 (reflected poly 0xA001) remainder for every byte value"""
+    table = array.array('H')
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+_CRC16_TABLE = _build_crc16_table()
+
+# The vane only reports these 8 angles, so names are a direct lookup
+_DIRECTION_NAMES = {0: 'N', 45: 'NE', 90: 'E', 135: 'SE', 180: 'S', 225: 'SW', 270: 'W', 315: 'NW'}
 
 class WindVaneReader:
     def __init__(self, port=WIND_VANE_PORT, device_address=1):
@@ -22,11 +44,13 @@ class WindVaneReader:
         self.device_address = device_address
         self.serial_conn = None
         
-        # Threading support
+        # Threading support; _wake cuts the wait between polls short
+        # (close() or trigger_read())
         self.running = False
-        self.lock = threading.Lock()
+        self._wake = threading.Event()
         
-        # Latest wind data storage
+        # Latest wind data storage. Only the read thread publishes it, by
+        # rebinding a fresh dict (atomic under the GIL), so readers need no lock
         self.latest_wind = {
             'direction': 0.0,
             'direction_name': 'Unknown',
@@ -36,7 +60,11 @@ class WindVaneReader:
         }
         
         # Valid wind angles for 8-position wind vane
-        self.valid_angles = [0, 45, 90, 135, 180, 225, 270, 315]
+        self.valid_angles = list(_DIRECTION_NAMES)
+        
+        # Modbus RTU: Read register 1 (holding register) - contains degree orientation.
+        # The request never changes, so it is built (with CRC) once
+        self._direction_request = self._build_request(device_address, 0x03, 0x0001, 0x0001)
         
         # Connect and start thread
         self.connect()
@@ -52,6 +80,8 @@ class WindVaneReader:
                 stopbits=serial.STOPBITS_ONE,
                 timeout=1.0
             )
+            # Modbus replies come back through a USB RS485 adapter
+            set_low_latency(self.serial_conn)
             logger.info(f"Wind vane connected on {self.port}")
             
             # Start background reading thread
@@ -71,29 +101,29 @@ class WindVaneReader:
                 direction = self._read_wind_direction()
                 direction_name = self._get_direction_name(direction) if direction is not None else 'Unknown'
                 
-                with self.lock:
-                    self.latest_wind.update({
-                        'direction': direction if direction is not None else 0.0,
-                        'direction_name': direction_name,
-                        'speed': 0.0,  # Wind vane only measures direction
-                        'timestamp': time.time(),
-                        'valid': direction is not None
-                    })
+                self.latest_wind = {
+                    'direction': direction if direction is not None else 0.0,
+                    'direction_name': direction_name,
+                    'speed': 0.0,  # Wind vane only measures direction
+                    'timestamp': time.time(),
+                    'valid': direction is not None
+                }
                     
             except Exception as e:
                 print(f"Wind reading error: {e}")
-                with self.lock:
-                    self.latest_wind['valid'] = False
+                self.latest_wind = {**self.latest_wind, 'valid': False}
             
-            time.sleep(2.0)  # Read every 2 seconds
+            # Read every 2 seconds, or straight away when woken
+            if self._wake.wait(2.0):
+                self._wake.clear()
+    
+    def trigger_read(self):
+        """Poll the wind vane now instead of at the next 2 s tick"""
+        self._wake.set()
     
     def _get_direction_name(self, degrees):
-        """Convert degrees to compass direction name"""
-        if degrees is None:
-            return 'Unknown'
-        directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
-        index = int((degrees + 22.5) / 45) % 8
-        return directions[index]
+        """Convert one of the vane's 8 angles to a compass direction name"""
+        return _DIRECTION_NAMES.get(int(degrees), 'Unknown')
     
     def _read_wind_direction(self) -> Optional[float]:
         """Read wind direction from register 1 (degree orientation)"""
@@ -101,14 +131,8 @@ class WindVaneReader:
             return None
             
         try:
-            # Modbus RTU: Read register 1 (holding register) - contains degree orientation
-            request = bytes([self.device_address, 0x03, 0x00, 0x01, 0x00, 0x01])
-            
-            crc = self._calculate_crc16(request)
-            request += crc.to_bytes(2, 'little')
-            
             self.serial_conn.flushInput()
-            self.serial_conn.write(request)
+            self.serial_conn.write(self._direction_request)
             
             response = self.serial_conn.read(7)  # Expected: addr + func + bytes + data + crc
             
@@ -117,7 +141,7 @@ class WindVaneReader:
                 angle = (response[3] << 8) | response[4]
                 
                 # Validate that angle is one of the 8 valid directions
-                if angle in self.valid_angles:
+                if angle in _DIRECTION_NAMES:
                     return float(angle)
                 else:
                     print(f"Invalid wind angle: {angle} (expected one of {self.valid_angles})")
@@ -129,22 +153,24 @@ class WindVaneReader:
             return None
     
     
-    def _calculate_crc16(self, data):
+    @classmethod
+    def _build_request(cls, address, function, register, count):
+        """Build a Modbus RTU request frame including its CRC"""
+        request = bytes([address, function]) + register.to_bytes(2, 'big') + count.to_bytes(2, 'big')
+        return request + cls._calculate_crc16(request).to_bytes(2, 'little')
+    
+    @staticmethod
+    def _calculate_crc16(data):
         """Calculate Modbus CRC16"""
+        tbl = _CRC16_TABLE
         crc = 0xFFFF
         for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ 0xA001
-                else:
-                    crc >>= 1
+            crc = (crc >> 8) ^ tbl[(crc ^ byte) & 0xFF]
         return crc
     
     def read_wind(self) -> Dict[str, any]:
         """Get latest wind data (non-blocking)"""
-        with self.lock:
-            return self.latest_wind.copy()
+        return self.latest_wind.copy()
     
     def get_status(self) -> Dict[str, any]:
         """Get wind vane connection status"""
@@ -158,6 +184,7 @@ class WindVaneReader:
     def close(self):
         """Close wind vane connection"""
         self.running = False
+        self._wake.set()
         if self.serial_conn:
             self.serial_conn.close()
             logger.info("Wind vane connection closed")
@@ -173,8 +200,8 @@ if __name__ == "__main__":
             print("Direction will update every 2 seconds in background thread")
             print("-" * 50)
             
-            start_time = time.time()
-            while time.time() - start_time < 30:
+            start_time = time.monotonic()
+            while time.monotonic() - start_time < 30:
                 wind_data = wind_sensor.read_wind()
                 status = "Valid" if wind_data['valid'] else "Invalid"
                 
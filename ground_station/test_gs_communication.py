@@ -8,7 +8,9 @@ import os
 import time
 
 # Add project root to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from shared.lora_communication import LoRaCommunication
 from config import TEST_PING_MSG, TEST_PONG_MSG
@@ -2,4 +2,5 @@
 Shared utilities for UAV and Ground Station
 """
 
-from .logger import SimpleLogger
+from .logger import SimpleLogger, utc_timestamp
+from .serial_tuning import set_low_latency
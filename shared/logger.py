@@ -3,23 +3,149 @@ Lightweight Shared Logger
 Simple logging utility for UAV and Ground Station
 """
 
+import atexit
+import queue
+import sys
+import threading
 import time
 
+from config import DEBUG_MODE
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+# Raw records are queued by callers and formatted and written in bursts by a
+# background thread, so logging never blocks the control loops on JSON
+# encoding or console I/O. Dict entries must not be mutated after logging.
+# The queue is bounded so an error storm or a stalled console can't grow
+# memory without limit; records that don't fit are dropped and counted.
+LOG_QUEUE_SIZE = 4096
+_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_STOP = None
+
+_dropped = 0
+_dropped_lock = threading.Lock()
+
+_clock_cache = (0, '')
+
+def _clock(created: float) -> str:
+    """HH:MM:SS for a record time, only reformatted when the second changes"""
+    global _clock_cache
+    sec = int(created)
+    cached_sec, text = _clock_cache
+    if sec != cached_sec:
+        text = time.strftime('%H:%M:%S', time.localtime(sec))
+        _clock_cache = (sec, text)
+    return text
+
+def _format(record):
+    """Turn a queued (time, level, msg, args) record into one output line"""
+    created, level, msg, args = record
+    if args:
+        # printf-style arguments are only formatted once a line is written
+        msg = msg % args
+    elif isinstance(msg, dict):
+        # Structured log entries are written as a single JSON line
+        if ORJSON_AVAILABLE:
+            msg = orjson.dumps(msg, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        else:
+            msg = json.dumps(msg, default=str)
+    
+    return f"[{_clock(created)}] {level}: {msg}\n"
+
+def _take_dropped() -> int:
+    """Number of records dropped since the last call"""
+    global _dropped
+    with _dropped_lock:
+        dropped, _dropped = _dropped, 0
+    return dropped
+
+def _writer():
+    """Drain queued records and write each burst with a single write/flush"""
+    running = True
+    while running:
+        batch = [_queue.get()]
+        try:
+            while True:
+                batch.append(_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        lines = []
+        for record in batch:
+            if record is _STOP:
+                running = False
+                continue
+            try:
+                lines.append(_format(record))
+            except Exception as e:
+                lines.append(f"[{_clock(time.time())}] ERROR: Could not format log record: {e}\n")
+        
+        dropped = _take_dropped()
+        if dropped:
+            lines.append(f"[{_clock(time.time())}] WARN: Dropped {dropped} log records (queue full)\n")
+        
+        if lines:
+            sys.stdout.write(''.join(lines))
+            sys.stdout.flush()
+
+_writer_thread = threading.Thread(target=_writer, name="SimpleLogger", daemon=True)
+_writer_thread.start()
+
+@atexit.register
+def _shutdown():
+    """Write out anything still queued before the interpreter exits"""
+    try:
+        _queue.put(_STOP, timeout=2)
+    except queue.Full:
+        return
+    _writer_thread.join(timeout=2)
+
+_iso_cache = (0, '')
+
+def utc_timestamp() -> str:
+    """ISO-8601 UTC timestamp with microseconds, e.g. 2025-07-15T06:12:01.123456Z"""
+    global _iso_cache
+    sec, usec = divmod(time.time_ns() // 1000, 1_000_000)
+    
+    # The date/time part only changes once per second, so reuse it until then
+    cached_sec, base = _iso_cache
+    if sec != cached_sec:
+        base = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec))
+        _iso_cache = (sec, base)
+    
+    return f"{base}.{usec:06d}Z"
+
+def _emit(level, msg, args=()):
+    """Hand one unformatted log record to the writer thread, dropping it if the queue is full"""
+    global _dropped
+    try:
+        _queue.put_nowait((time.time(), level, msg, args))
+    except queue.Full:
+        with _dropped_lock:
+            _dropped += 1
+
 class SimpleLogger:
     """Lightweight logger for console output"""
     
     @staticmethod
-    def info(msg):
-        print(f"[{time.strftime('%H:%M:%S')}] INFO: {msg}")
+    def info(msg, *args):
+        _emit("INFO", msg, args)
     
     @staticmethod
-    def warning(msg):
-        print(f"[{time.strftime('%H:%M:%S')}] WARN: {msg}")
+    def warning(msg, *args):
+        _emit("WARN", msg, args)
     
     @staticmethod
-    def error(msg):
-        print(f"[{time.strftime('%H:%M:%S')}] ERROR: {msg}")
+    def error(msg, *args):
+        _emit("ERROR", msg, args)
     
     @staticmethod
-    def debug(msg):
-        print(f"[{time.strftime('%H:%M:%S')}] DEBUG: {msg}")
+    def debug(msg, *args):
+        # Debug chatter is dropped before formatting unless DEBUG_MODE is on
+        if DEBUG_MODE:
+            _emit("DEBUG", msg, args)
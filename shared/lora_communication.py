@@ -1,19 +1,36 @@
 """
 LoRa Communication Module
 Universal LoRa communication interface for both ground station and UAV
+Timeouts and peer liveness use time.monotonic(); last_message_time stays a wall-clock timestamp
 """
 
+import re
 import serial
+import select
 import time
 import threading
-from typing import Optional
+from collections import deque
+from typing import Optional, Tuple
 import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 from config import LORA_PORT, LORA_BAUDRATE
 from shared import SimpleLogger as logger
+from shared import set_low_latency
+
+# Longest line the Heltec bridge can emit (255 byte LoRa payload plus status
+# prefix); anything longer without a terminator is RF garbage
+MAX_PACKET_LENGTH = 512
+
+# WIND,timestamp,wind_direction_deg,wind_speed_mps (fractions optional)
+_WIND_RE = re.compile(r'WIND,(\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)')
+
+# INIT,timestamp,ground_lat,ground_lon (fractions optional)
+_INIT_RE = re.compile(r'INIT,(\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)')
 
 class LoRaCommunication:
     def __init__(self, port=LORA_PORT, baudrate=LORA_BAUDRATE):
@@ -27,8 +44,18 @@ class LoRaCommunication:
         self.port = port
         self.baudrate = baudrate
         self.serial_conn = None
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # serialises writes and close
         self.last_message_time = 0
+        self._last_rx_monotonic = float('-inf')  # never heard from peer
+        
+        # Receive state: raw bytes not yet terminated by a newline, and
+        # complete packets that arrived in the same read burst. Only the
+        # thread calling receive_message touches these, so the receive
+        # path takes no lock
+        self._fd = None
+        self._scratch = memoryview(bytearray(MAX_PACKET_LENGTH))
+        self._rx_buf = bytearray()
+        self.received_packets = deque()
         
         self.connect()
     
@@ -43,6 +70,9 @@ class LoRaCommunication:
                 bytesize=serial.EIGHTBITS,
                 timeout=1
             )
+            self._fd = self.serial_conn.fileno()
+            self._rx_buf.clear()  # drop any partial frame from a previous connection
+            set_low_latency(self.serial_conn)
             
             logger.info(f"LoRa module connected on {self.port}")
             
@@ -50,6 +80,10 @@ class LoRaCommunication:
             logger.error(f"Failed to connect to LoRa module: {e}")
             raise
     
+    def fileno(self) -> int:
+        """File descriptor of the LoRa UART, for select()/selectors"""
+        return self._fd
+    
     def send_message(self, message: str) -> bool:
         """
         Send message via LoRa
@@ -64,14 +98,25 @@ class LoRaCommunication:
             return False
         
         try:
+            frame = message.encode()
+            if not frame.endswith(b'\n'):
+                frame += b'\n'
+            
+            # No flush(): that is tcdrain(), which blocks until the frame has
+            # left the UART; the tty buffer drains it in the background
             with self.lock:
-                if not message.endswith('\n'):
-                    message += '\n'
-                
-                self.serial_conn.write(message.encode())
-                self.serial_conn.flush()
-                logger.info(f"LoRa sent: {message.strip()}")
-                return True
+                # Write straight to the fd like the receive path. pyserial
+                # opens it non-blocking, so if the tty buffer is ever full
+                # its write() finishes off the remainder
+                try:
+                    n = os.write(self._fd, frame)
+                except BlockingIOError:
+                    n = 0
+                if n < len(frame):
+                    self.serial_conn.write(frame[n:])
+            
+            logger.debug("LoRa sent: %s", message)
+            return True
             
         except Exception as e:
             logger.error(f"Error sending LoRa message: {e}")
@@ -82,31 +127,127 @@ class LoRaCommunication:
         Receive message from LoRa
         
         Args:
-            timeout: Maximum time to wait for message
+            timeout: Maximum time to wait for message (0 polls without blocking)
             
         Returns:
             Received message string or None if timeout
+            
+        Raises:
+            OSError: the port has failed (serial.SerialException on hang-up);
+                a dead UART stays readable, so callers must stop polling it
         """
         if not self.serial_conn:
             return None
         
         try:
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                if self.serial_conn.in_waiting > 0:
-                    with self.lock:
-                        message = self.serial_conn.readline().decode().strip()
-                        if message:
-                            logger.info(f"LoRa received: {message}")
-                            self.last_message_time = time.time()
-                            return message
-                time.sleep(0.01)  # Prevent CPU spinning
+            deadline = time.monotonic() + timeout
+            while not self.received_packets:
+                remaining = max(deadline - time.monotonic(), 0)
+                
+                # Block in the kernel until the UART has data
+                ready, _, _ = select.select([self._fd], [], [], remaining)
+                if not ready:
+                    return None
+                
+                # Read straight from the fd into a reused scratch buffer: one
+                # syscall for whatever has arrived, no per-read bytes object
+                try:
+                    n = os.readv(self._fd, [self._scratch])
+                except BlockingIOError:
+                    continue  # spurious wakeup, nothing to read yet
+                if n == 0:
+                    raise serial.SerialException("LoRa module disconnected (readable but no data)")
+                
+                self._rx_buf += self._scratch[:n]
+                self._extract_packets()
+            
+            message = self.received_packets.popleft()
+            logger.debug("LoRa received: %s", message)
+            self.last_message_time = time.time()
+            self._last_rx_monotonic = time.monotonic()
+            return message
             
+        except OSError:
+            raise
         except Exception as e:
             logger.error(f"Error receiving LoRa message: {e}")
         
         return None
     
+    def discard_pending(self) -> int:
+        """
+        Drop received packets and buffered bytes that nobody has consumed yet
+        
+        Call before sending a request whose reply will be awaited, so a late
+        reply to an earlier request isn't taken as the reply to this one.
+        
+        Returns:
+            Number of complete packets discarded
+            
+        Raises:
+            OSError: the port has failed (see receive_message)
+        """
+        # Late replies still prove the peer is alive, so they go through
+        # the normal receive path and only their contents are thrown away
+        discarded = 0
+        while self.receive_message(timeout=0) is not None:
+            discarded += 1
+        self._rx_buf.clear()
+        return discarded
+    
+    def _extract_packets(self):
+        """Move complete lines from the receive buffer into received_packets"""
+        buf = self._rx_buf
+        while True:
+            idx = buf.find(b'\n')
+            if idx < 0:
+                idx = buf.find(b'\r')
+                if idx < 0:
+                    break
+            
+            # Decode once per packet; corrupted bytes must not raise
+            message = buf[:idx].decode('ascii', errors='replace').strip()
+            del buf[:idx + 1]
+            if message:
+                self.received_packets.append(message)
+        
+        # Don't keep rescanning an ever-growing unterminated buffer
+        if len(buf) > MAX_PACKET_LENGTH:
+            logger.warning(f"Discarding {len(buf)} unterminated bytes from LoRa module")
+            buf.clear()
+    
+    @staticmethod
+    def parse_wind(packet: str) -> Optional[Tuple[float, float, float]]:
+        """
+        Parse a WIND packet in a single regex pass
+        
+        Args:
+            packet: Received packet string
+            
+        Returns:
+            (timestamp, wind_direction_deg, wind_speed_mps) or None if malformed
+        """
+        match = _WIND_RE.fullmatch(packet)
+        if not match:
+            return None
+        return float(match[1]), float(match[2]), float(match[3])
+    
+    @staticmethod
+    def parse_init(packet: str) -> Optional[Tuple[float, float, float]]:
+        """
+        Parse an INIT packet in a single regex pass
+        
+        Args:
+            packet: Received packet string
+            
+        Returns:
+            (timestamp, ground_lat, ground_lon) or None if malformed
+        """
+        match = _INIT_RE.fullmatch(packet)
+        if not match:
+            return None
+        return float(match[1]), float(match[2]), float(match[3])
+    
     def is_connected(self) -> bool:
         """Check if LoRa module is connected and ready"""
         return self.serial_conn is not None and self.serial_conn.is_open
@@ -117,7 +258,7 @@ class LoRaCommunication:
     
     def is_peer_connected(self, timeout=30) -> bool:
         """Check if peer responded within timeout period"""
-        return (time.time() - self.last_message_time) < timeout
+        return (time.monotonic() - self._last_rx_monotonic) < timeout
     
     def close(self):
         """Close LoRa connection"""
@@ -0,0 +1,37 @@
+"""
+Serial Port Tuning
+Linux driver tweaks shared by every UART/USB-serial reader
+"""
+
+import fcntl
+import struct
+import termios
+
+from .logger import SimpleLogger as logger
+
+# Linux serial_struct: flags is the fifth int (after type, line, port, irq)
+ASYNC_LOW_LATENCY = 0x2000
+_SERIAL_FLAGS_OFFSET = 16
+_SERIAL_STRUCT_SIZE = 128  # larger than sizeof(struct serial_struct) on any ABI
+
+def set_low_latency(serial_conn) -> bool:
+    """
+    Ask the driver to push received bytes immediately (ASYNC_LOW_LATENCY)
+
+    On FTDI and similar USB adapters this drops the 16 ms latency timer to 1 ms.
+
+    Returns:
+        True if the flag was set
+    """
+    try:
+        fd = serial_conn.fileno()
+        serial_struct = bytearray(_SERIAL_STRUCT_SIZE)
+        fcntl.ioctl(fd, termios.TIOCGSERIAL, serial_struct)
+        flags, = struct.unpack_from('i', serial_struct, _SERIAL_FLAGS_OFFSET)
+        struct.pack_into('i', serial_struct, _SERIAL_FLAGS_OFFSET, flags | ASYNC_LOW_LATENCY)
+        fcntl.ioctl(fd, termios.TIOCSSERIAL, serial_struct)
+        return True
+    except (OSError, AttributeError) as e:
+        # Ports without TIOCSSERIAL support (e.g. some native UARTs, ptys) just skip it
+        logger.debug(f"Low-latency mode not available on {serial_conn.port}: {e}")
+        return False